@@ -1,9 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, selectinload
+from starlette.concurrency import run_in_threadpool
 from database import get_db
 from models import Project, Task
 from schemas import AIRequest
+from cache import TTLCache
+from search_router import search_projects
 import google.generativeai as genai
+import asyncio
+import hashlib
+import json
 import os
 from dotenv import load_dotenv
 
@@ -11,6 +18,17 @@ load_dotenv()
 
 genai.configure(api_key=os.getenv("API_KEY"))
 
+MODEL_NAME = os.getenv("AI_MODEL", "models/gemini-1.5-flash")
+AI_TIMEOUT = float(os.getenv("AI_TIMEOUT", "30"))
+
+# Analyses keyed by a hash of (project snapshot, prompt); an unchanged project asked the same
+# question is answered without calling the model. Values are (project_id, text) so a
+# project's entries can be dropped when it changes.
+analysis_cache = TTLCache(
+    maxsize=int(os.getenv("AI_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("AI_CACHE_TTL", "3600")),
+)
+
 router = APIRouter()
 from pydantic import BaseModel
 
@@ -18,13 +36,25 @@ class AIRequest(BaseModel):
     projectName: str
     prompt: str
 
-@router.post("/ai/analyze")
-def analyze_project(request: AIRequest, db: Session = Depends(get_db)):
-    project = db.query(Project).filter(Project.name.ilike(f"%{request.projectName}%")).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
+_model = None
+
+def get_model():
+    # One shared client for the process instead of a new GenerativeModel per request
+    global _model
+    if _model is None:
+        _model = genai.GenerativeModel(MODEL_NAME)
+    return _model
+
+def set_model(model):
+    # Swaps the client (tests and benchmarks inject tests/fakes.py:FakeModel); None restores Gemini
+    global _model
+    _model = model
+    analysis_cache.clear()
 
-    # Build project context
+def invalidate_project(project_id: int):
+    return analysis_cache.discard_where(lambda entry: entry[0] == project_id)
+
+def build_project_context(project):
     input_text = f"Project Name: {project.name}\n"
     if project.address:
         input_text += f"Address: {project.address}\n"
@@ -39,10 +69,111 @@ def analyze_project(request: AIRequest, db: Session = Depends(get_db)):
             input_text += ")\n"
     else:
         input_text += "- No tasks found.\n"
+    return input_text
+
+def build_prompt(project, prompt):
+    return f"Project data:\n\n{build_project_context(project)}\n\nUser request: \"{prompt}\""
+
+def cache_key(project, final_prompt):
+    # The drawing version isn't part of the prompt but still marks a new project snapshot
+    snapshot = f"{MODEL_NAME}\0{project.id}\0{project.drawing_version}\0{final_prompt}"
+    return hashlib.sha256(snapshot.encode("utf-8")).hexdigest()
+
+def find_project(db: Session, name: str):
+    # Best-ranked search hit rather than an arbitrary substring match
+    hits = search_projects(db, name, limit=1)
+    if not hits:
+        return None
+    return (
+        db.query(Project)
+        .options(selectinload(Project.tasks))
+        .filter(Project.id == hits[0][0])
+        .first()
+    )
+
+async def generate(final_prompt):
+    try:
+        response = await asyncio.wait_for(get_model().generate_content_async(final_prompt), timeout=AI_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="AI model timed out")
+    return response.text
+
+async def load_prompt(db: Session, request: AIRequest):
+    # Returns (project_id, final_prompt, cache_key); the DB work runs on the threadpool
+    def load():
+        project = find_project(db, request.projectName)
+        if not project:
+            return None
+        final_prompt = build_prompt(project, request.prompt)
+        return project.id, final_prompt, cache_key(project, final_prompt)
+
+    loaded = await run_in_threadpool(load)
+    if loaded is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return loaded
+
+async def close_stream(chunks):
+    aclose = getattr(chunks, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/ai/analyze")
+async def analyze_project(request: AIRequest, db: Session = Depends(get_db)):
+    project_id, final_prompt, key = await load_prompt(db, request)
+
+    cached = analysis_cache.get(key)
+    if cached is not None:
+        return {"analysis": cached[1]}
+
+    text = await generate(final_prompt)
+    analysis_cache.set(key, (project_id, text))
+    return {"analysis": text}
+
+@router.post("/ai/analyze/stream")
+async def analyze_project_stream(request: AIRequest, http_request: Request, db: Session = Depends(get_db)):
+    # Server-Sent Events: "chunk" events carry partial text, then one "done" (or "error") event.
+    # Generation stops as soon as the client disconnects, so unread tokens aren't paid for.
+    project_id, final_prompt, key = await load_prompt(db, request)
+
+    async def events():
+        cached = analysis_cache.get(key)
+        if cached is not None:
+            yield sse("chunk", {"text": cached[1]})
+            yield sse("done", {"cached": True})
+            return
+
+        # AI_TIMEOUT bounds opening the stream and then every wait for the next chunk, so a model
+        # that stalls mid-answer can't hold the request open; the upstream stream is always closed
+        parts = []
+        chunks = None
+        try:
+            stream = await asyncio.wait_for(
+                get_model().generate_content_async(final_prompt, stream=True), timeout=AI_TIMEOUT
+            )
+            chunks = stream.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=AI_TIMEOUT)
+                except StopAsyncIteration:
+                    break
+                if await http_request.is_disconnected():
+                    return
+                parts.append(chunk.text)
+                yield sse("chunk", {"text": chunk.text})
+        except asyncio.TimeoutError:
+            yield sse("error", {"detail": "AI model timed out"})
+            return
+        finally:
+            await close_stream(chunks)
 
-    # Final prompt to Gemini
-    final_prompt = f"Project data:\n\n{input_text}\n\nUser request: \"{request.prompt}\""
-    model = genai.GenerativeModel("models/gemini-1.5-flash")
-    response = model.generate_content(final_prompt)
+        analysis_cache.set(key, (project_id, "".join(parts)))
+        yield sse("done", {"cached": False})
 
-    return {"analysis": response.text}
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
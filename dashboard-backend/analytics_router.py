@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from database import get_db
+from models import Project, Task
+from pagination import MAX_PAGE_SIZE
+
+router = APIRouter()
+
+# Projects listed in the summary: the ones with the most open (not completed) tasks
+SUMMARY_TOP_PROJECTS = 20
+
+@router.get("/analytics/summary")
+def analytics_summary(
+    limit: int = Query(SUMMARY_TOP_PROJECTS, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    # Everything is aggregated in SQL and the project list is capped at `limit`, so the payload
+    # depends on the number of statuses/roles and never on the number of projects or tasks.
+    project_count = db.query(func.count(Project.id)).scalar()
+
+    status_counts = dict(
+        db.query(Task.status, func.count(Task.id)).group_by(Task.status).all()
+    )
+    role_counts = dict(
+        db.query(Task.role, func.count(Task.id)).group_by(Task.role).all()
+    )
+
+    # Per-project progress comes from the counters kept on projects (see progress.py),
+    # a plain scan of the projects table with no join against tasks
+    open_tasks = Project.tasks_total - Project.tasks_completed
+    rows = (
+        db.query(Project.id, Project.name, Project.tasks_total, Project.tasks_completed)
+        .order_by(open_tasks.desc(), Project.id)
+        .limit(limit)
+        .all()
+    )
+
+    task_count = sum(status_counts.values())
+    return {
+        "project_count": project_count,
+        "task_count": task_count,
+        "pending_count": task_count - status_counts.get("Completed", 0),
+        "status_counts": status_counts,
+        "role_counts": role_counts,
+        "projects": [
+            {
+                "id": pid,
+                "name": name,
+                "total": total,
+                "completed": done,
+                "completion": done / total if total else 0.0,
+            }
+            for pid, name, total, done in rows
+        ],
+    }
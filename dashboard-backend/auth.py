@@ -1,13 +1,51 @@
 from passlib.context import CryptContext
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from fastapi import Depends, Header, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+import asyncio
 import os
+import threading
+import time
+from cache import TTLCache
+from database import get_db, get_async_db
+from models import User
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Changing BCRYPT_ROUNDS makes existing hashes "need update"; they are rehashed on next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# bcrypt runs in a separate process pool so it scales across cores and never holds the event loop.
+# At most PASSWORD_HASH_QUEUE calls may be running or waiting; beyond that callers get
+# PasswordHashPoolBusy (mapped to 503 + Retry-After) instead of an unbounded queue.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", str(PASSWORD_HASH_WORKERS * 4)))
+PASSWORD_HASH_RETRY_AFTER = 1
+
+class PasswordHashPoolBusy(Exception):
+    pass
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_QUEUE)
+
+# What get_current_user hands to routes; resolved once per token and then served from user_cache
+CurrentUser = namedtuple("CurrentUser", ["id", "username", "role", "claims"])
+
+user_cache = TTLCache(
+    maxsize=int(os.getenv("AUTH_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("AUTH_CACHE_TTL", "60")),
+)
 
 def hash_password(password: str):
     return pwd_context.hash(password)
@@ -15,6 +53,34 @@ def hash_password(password: str):
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password, hashed_password):
+    # Returns (verified, new_hash); new_hash is set when the stored hash uses outdated parameters
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def _get_hash_pool():
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+        return _hash_pool
+
+async def _run_in_hash_pool(fn, *args):
+    if not _hash_slots.acquire(blocking=False):
+        raise PasswordHashPoolBusy()
+    try:
+        future = _get_hash_pool().submit(fn, *args)
+    except BaseException:
+        _hash_slots.release()
+        raise
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return await asyncio.wrap_future(future)
+
+async def hash_password_async(password: str):
+    return await _run_in_hash_pool(hash_password, password)
+
+async def verify_and_update_password_async(plain_password, hashed_password):
+    return await _run_in_hash_pool(verify_and_update_password, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
@@ -26,3 +92,61 @@ def decode_access_token(token: str):
         return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         return None
+
+def cache_current_user(token: str, user: CurrentUser):
+    # Never keep a token cached past its own expiry
+    remaining = user.claims.get("exp", 0) - time.time()
+    user_cache.set(token, user, ttl=remaining)
+
+def invalidate_user(user_id: int):
+    return user_cache.discard_where(lambda cached: cached.id == user_id)
+
+# Route dependencies; any router can require a signed-in user with Depends(get_current_user)
+def get_current_user(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Missing token")
+
+    return resolve_user(authorization.split(" ")[1], db)
+
+# Async twin of get_current_user for async def routes; shares the same token cache
+async def get_current_user_async(
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Missing token")
+
+    token = authorization.split(" ")[1]
+    cached = user_cache.get(token)
+    if cached is not None:
+        return cached
+
+    payload = token_payload(token)
+    user = (await db.execute(user_lookup(payload))).first()
+    return remember_user(token, payload, user)
+
+def resolve_user(token: str, db: Session):
+    cached = user_cache.get(token)
+    if cached is not None:
+        return cached
+
+    payload = token_payload(token)
+    user = db.execute(user_lookup(payload)).first()
+    return remember_user(token, payload, user)
+
+def token_payload(token: str):
+    payload = decode_access_token(token)
+    if not payload:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return payload
+
+def user_lookup(payload):
+    return select(User.id, User.username, User.role).where(User.username == payload["sub"])
+
+def remember_user(token: str, payload, user):
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+
+    current = CurrentUser(id=user.id, username=user.username, role=user.role, claims=payload)
+    cache_current_user(token, current)
+    return current
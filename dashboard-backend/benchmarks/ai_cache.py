@@ -0,0 +1,50 @@
+# Measures /ai/analyze latency and cache hit rate against the offline fake model.
+#
+# Usage (from dashboard-backend/): python -m benchmarks.ai_cache [--requests 200] [--projects 20] [--delay 0.2]
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.2, help="simulated model latency in seconds")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+    from fastapi.testclient import TestClient
+    import ai_router
+    import main as app_module
+    import migrations
+    from database import engine
+    from models import Base
+    from tests.fakes import FakeModel
+
+    ai_router.set_model(FakeModel(delay=args.delay))
+
+    Base.metadata.create_all(bind=engine)
+    migrations.upgrade(engine)
+    client = TestClient(app_module.app)
+    for i in range(args.projects):
+        client.post("/projects/", params={"name": f"Bench Project {i:04d}"})
+
+    latencies = []
+    for i in range(args.requests):
+        body = {"projectName": f"Bench Project {i % args.projects:04d}", "prompt": "What is blocked?"}
+        start = time.perf_counter()
+        client.post("/ai/analyze", json=body).raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    stats = ai_router.analysis_cache.stats()
+    latencies.sort()
+    print(f"requests={args.requests} model_calls={ai_router.get_model().calls} "
+          f"hit_rate={stats['hits'] / max(1, stats['hits'] + stats['misses']):.2%}")
+    print(f"p50={statistics.median(latencies):.1f}ms p95={latencies[int(len(latencies) * 0.95) - 1]:.1f}ms "
+          f"max={latencies[-1]:.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# Load test: the async read endpoints (/projects/, /my-tasks, /notifications) against sync twins
+# that run the same queries through the threadpool-backed Session, at N concurrent clients.
+# The sync twins don't use the rendered-view cache, so it is off (VIEW_CACHE_BACKEND=off) for
+# both and the comparison is of the database access alone.
+#
+# Usage (from dashboard-backend/): python -m benchmarks.async_load [--clients 500] [--seconds 10]
+# Needs uvicorn, httpx and aiosqlite.
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+PORT = 8799
+
+def add_sync_twins(app):
+    # Sync versions of the ported handlers, as they were before the async port
+    from typing import List, Optional
+    from fastapi import Depends, Request, Response
+    from sqlalchemy.orm import Session, load_only, selectinload
+    import main
+    from etags import conditional, make_etag, table_version_stmt
+    from models import Notification, Project, Task
+    from pagination import Page, fetch_page, parse_fields
+    from schemas import MyTasksGroup
+    from view_cache import cached_response, render_json
+
+    @app.get("/sync/projects/")
+    def sync_projects(response: Response, page: Page = Depends(), db: Session = Depends(main.get_db)):
+        query = db.query(Project).options(
+            load_only(Project.id, Project.name),
+            selectinload(Project.tasks).load_only(Task.id, Task.name, Task.status, Task.role),
+        )
+        result = [
+            {"id": p.id, "name": p.name,
+             "tasks": [{"id": t.id, "name": t.name, "status": t.status, "role": t.role} for t in p.tasks]}
+            for p in page.apply(query, Project.id).all()
+        ]
+        page.set_next(response, result)
+        return result
+
+    @app.get("/sync/my-tasks", response_model=List[MyTasksGroup])
+    def sync_my_tasks(
+        request: Request,
+        response: Response,
+        user=Depends(main.get_current_user),
+        db: Session = Depends(main.get_db)
+    ):
+        # Same version lookup, query and rendering as the async route
+        version = db.scalar(table_version_stmt())
+        etag = make_etag("my-tasks", user.id, version or 0)
+        not_modified = conditional(request, response, etag)
+        if not_modified:
+            return not_modified
+        tasks = db.execute(main.my_tasks_stmt(user.id)).scalars().all()
+        return cached_response(({}, render_json(List[MyTasksGroup], main.group_my_tasks(tasks))), response)
+
+    @app.get("/sync/notifications")
+    def sync_notifications(
+        response: Response,
+        page: Page = Depends(),
+        fields: Optional[str] = None,
+        user=Depends(main.get_current_user),
+        db: Session = Depends(main.get_db)
+    ):
+        field_names = parse_fields(fields, main.NOTIFICATION_FIELDS, ["id", "message", "task_id"])
+        rows = fetch_page(db, Notification, page, field_names, Notification.user_id == user.id)
+        page.set_next(response, rows)
+        return rows
+
+def serve():
+    import uvicorn
+    import main
+
+    add_sync_twins(main.app)
+    uvicorn.run(main.app, host="127.0.0.1", port=PORT, log_level="warning")
+
+def seed(n_projects, n_users):
+    from sqlalchemy import insert
+    import migrations
+    import models
+    from database import engine
+
+    models.Base.metadata.create_all(bind=engine)
+    migrations.upgrade(engine)
+    rng = random.Random(1)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"id": i, "username": f"user{i}", "password_hash": "x", "role": "Supervisor"}
+            for i in range(1, n_users + 1)
+        ])
+        conn.execute(insert(models.Project), [{"id": i, "name": f"Project {i}"} for i in range(1, n_projects + 1)])
+        conn.execute(insert(models.Task), [
+            {"name": f"Task {j}", "project_id": pid, "user_id": rng.randint(1, n_users), "status": "Pending"}
+            for pid in range(1, n_projects + 1) for j in range(15)
+        ])
+        conn.execute(insert(models.Notification), [
+            {"user_id": rng.randint(1, n_users), "message": "Drawing version updated"} for _ in range(n_projects * 5)
+        ])
+
+async def drive(paths, headers, clients, seconds):
+    import httpx
+
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits, timeout=60) as client:
+        async def worker(i):
+            nonlocal errors
+            n = i
+            while time.perf_counter() < deadline:
+                path = paths[n % len(paths)]
+                n += 1
+                start = time.perf_counter()
+                try:
+                    r = await client.get(path, headers=headers)
+                    r.raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+                except Exception:
+                    errors += 1
+        await asyncio.gather(*(worker(i) for i in range(clients)))
+    return latencies, errors
+
+def report(label, latencies, errors, seconds):
+    latencies.sort()
+    q = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0
+    print(f"{label:<6} {len(latencies) / seconds:8.1f} req/s  p50={q(0.5):7.1f}ms  p95={q(0.95):7.1f}ms  "
+          f"p99={q(0.99):7.1f}ms  errors={errors}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve()
+        return
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ.setdefault("JOB_WORKERS", "0")
+    os.environ.setdefault("VIEW_CACHE_BACKEND", "off")
+    seed(args.projects, args.users)
+
+    from auth import create_access_token
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": "user1"})}
+
+    server = subprocess.Popen([sys.executable, "-m", "benchmarks.async_load", "--serve"], env=os.environ.copy())
+    try:
+        time.sleep(3)
+        for label, prefix in [("sync", "/sync"), ("async", "")]:
+            paths = [f"{prefix}/projects/?limit=20", f"{prefix}/my-tasks", f"{prefix}/notifications?limit=20"]
+            latencies, errors = asyncio.run(drive(paths, headers, args.clients, args.seconds))
+            report(label, latencies, errors, args.seconds)
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Write throughput of parallel task status updates: the old bare SQLite engine vs create_db_engine().
+#
+# Usage (from dashboard-backend/): python -m benchmarks.concurrent_writes [--threads 16] [--updates 200]
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import create_db_engine
+
+STATUSES = ["Pending", "In Progress", "Completed", "Blocked"]
+
+def run(label, bench_engine, threads, updates, n_tasks):
+    Session = sessionmaker(bind=bench_engine)
+    errors = []
+    done = [0]
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(updates):
+            db = Session()
+            try:
+                # Same shape as update_task_status: read the task, then change it
+                task = db.query(models.Task).filter(models.Task.id == rng.randint(1, n_tasks)).first()
+                task.status = rng.choice(STATUSES)
+                db.commit()
+                with lock:
+                    done[0] += 1
+            except Exception as exc:
+                db.rollback()
+                with lock:
+                    errors.append(type(exc).__name__)
+            finally:
+                db.close()
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {done[0] / elapsed:9.1f} updates/s  ok={done[0]} errors={len(errors)}"
+          + (f" ({', '.join(sorted(set(errors)))})" if errors else ""))
+
+def fresh_db(n_tasks):
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    setup = create_engine(url)
+    models.Base.metadata.create_all(bind=setup)
+    with setup.begin() as conn:
+        conn.execute(insert(models.Project), [{"id": 1, "name": "Bench"}])
+        conn.execute(insert(models.Task), [{"name": f"T{i}", "project_id": 1} for i in range(n_tasks)])
+    setup.dispose()
+    return url
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--updates", type=int, default=200, help="updates per thread")
+    parser.add_argument("--tasks", type=int, default=5000)
+    args = parser.parse_args()
+
+    before = create_engine(fresh_db(args.tasks), connect_args={"check_same_thread": False})
+    run("before (bare engine)", before, args.threads, args.updates, args.tasks)
+
+    after = create_db_engine(fresh_db(args.tasks))
+    run("after (create_db_engine)", after, args.threads, args.updates, args.tasks)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Shows SQLite query plans and timings for the hot per-user / per-project queries
+# on the pre-index schema, then migrates the same database and shows them again.
+#
+# Usage (from dashboard-backend/): python -m benchmarks.query_plans [--projects 2000] [--users 200]
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert, text
+
+import models
+from migrations import FK_INDEXES, upgrade
+
+QUERIES = {
+    "my-tasks": "SELECT * FROM tasks WHERE user_id = :uid",
+    "my-tasks by status": "SELECT id FROM tasks WHERE user_id = :uid AND status = 'In Progress'",
+    "project tasks": "SELECT * FROM tasks WHERE project_id = :pid",
+    "notifications page": "SELECT id, message, task_id FROM notifications WHERE user_id = :uid AND id > 0 ORDER BY id LIMIT 100",
+    "project roles": "SELECT * FROM role_assignments WHERE project_id = :pid",
+    "user roles": "SELECT * FROM role_assignments WHERE user_id = :uid",
+}
+
+STATUSES = ["Pending", "In Progress", "Completed", "Blocked"]
+
+def seed(conn, n_projects, n_users):
+    rng = random.Random(42)
+    conn.execute(insert(models.User), [
+        {"id": i, "username": f"user{i}", "password_hash": "x", "role": "Supervisor"}
+        for i in range(1, n_users + 1)
+    ])
+    conn.execute(insert(models.Project), [{"id": i, "name": f"Project {i}"} for i in range(1, n_projects + 1)])
+    tasks, roles, notifs = [], [], []
+    for pid in range(1, n_projects + 1):
+        for _ in range(15):
+            tasks.append({"name": "Task", "project_id": pid, "user_id": rng.randint(1, n_users),
+                          "status": rng.choice(STATUSES), "role": "Supervisor"})
+        for _ in range(8):
+            roles.append({"project_id": pid, "role": "Supervisor", "user_id": rng.randint(1, n_users)})
+        for _ in range(5):
+            notifs.append({"user_id": rng.randint(1, n_users), "message": "Drawing version updated"})
+    conn.execute(insert(models.Task), tasks)
+    conn.execute(insert(models.RoleAssignment), roles)
+    conn.execute(insert(models.Notification), notifs)
+
+def report(conn, label, n_users, n_projects, repeat=200):
+    print(f"\n=== {label} ===")
+    params = {"uid": n_users // 2, "pid": n_projects // 2}
+    for name, sql in QUERIES.items():
+        plan = conn.execute(text("EXPLAIN QUERY PLAN " + sql), params).fetchall()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(text(sql), params).fetchall()
+        elapsed = (time.perf_counter() - start) / repeat * 1000
+        print(f"{name:<22} {elapsed:8.3f} ms  | " + "; ".join(row[-1] for row in plan))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--projects", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=200)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    bench_engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=bench_engine)
+
+    # Recreate the pre-migration schema by dropping the indexes the migrations add
+    with bench_engine.begin() as conn:
+        for table in models.Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name in FK_INDEXES:
+                    index.drop(bind=conn)
+        seed(conn, args.projects, args.users)
+        conn.execute(text("ANALYZE"))
+        report(conn, "before migrations", args.users, args.projects)
+
+    print(f"\napplied migrations: {upgrade(bench_engine)}")
+    with bench_engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+        report(conn, "after migrations", args.users, args.projects)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+# Route benchmark and load test: drives every route of main.py, ai_router.py (fake model),
+# analytics_router.py and search_router.py through an in-process ASGI client against a seeded
+# SQLite database, then runs a multi-client load mix. Reports p50/p95/p99 latency, requests/s
+# and SQL statements per request, and can write them as JSON and compare with an earlier run.
+#
+# Usage (from dashboard-backend/):
+#   python -m benchmarks.routes [--iterations 50] [--clients 50] [--seconds 10] [--output run.json]
+#   python -m benchmarks.routes --compare baseline.json   (exits 1 on a regression past --threshold)
+# Needs httpx.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_PASSWORD = "password"
+# The ASGI transport buffers whole responses, so the notification stream is measured as a replay
+# of one full backlog page (the server then closes it); the bench user needs this many notifications
+STREAM_BACKLOG = 100
+REQUEST_TIMEOUT = 60
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+def summarize(latencies, sql_statements, requests, errors, seconds):
+    latencies = sorted(latencies)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / seconds, 1) if seconds else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "sql_per_request": round(sql_statements / requests, 2) if requests else 0.0,
+    }
+
+class Fixture:
+    # Ids the scenarios work on, picked from the seeded data. Destructive scenarios take rows
+    # from pools reserved for them so every iteration has something to delete.
+    def __init__(self, db, iterations):
+        from sqlalchemy import func
+        from models import Notification, Project, Task, User
+
+        self.user_id, self.username = db.query(User.id, User.username).join(
+            Notification, Notification.user_id == User.id
+        ).group_by(User.id).order_by(func.count(Notification.id).desc()).first()
+        project_ids = [pid for (pid,) in db.query(Project.id).order_by(Project.id)]
+        self.project_ids = project_ids[:-iterations * 2]
+        self.delete_project_ids = project_ids[-iterations:]
+        self.task_project_ids = project_ids[-iterations * 2:-iterations]
+        self.task_ids = [tid for (tid,) in db.query(Task.id).filter(Task.project_id.in_(self.project_ids[:200]))]
+        self.delete_task_ids = [
+            tid for (tid,) in db.query(Task.id).filter(Task.project_id.in_(self.task_project_ids)).order_by(Task.id)
+        ]
+        self.notification_ids = [
+            nid for (nid,) in db.query(Notification.id).filter(Notification.user_id == self.user_id).order_by(Notification.id)
+        ]
+        self.project_name = db.query(Project.name).filter(Project.id == self.project_ids[0]).scalar()
+        self.search_term = self.project_name.split()[0]
+
+def scenarios(fx, rng, counter):
+    # name -> function(i) returning (method, url, request kwargs); i counts iterations per scenario
+    from task_templates import get_template
+
+    roles = [{"role": t["role"], "userId": fx.user_id} for t in get_template("full-create")]
+    project = lambda: rng.choice(fx.project_ids)
+    task = lambda: rng.choice(fx.task_ids)
+    unique = lambda: next(counter)
+    full = lambda i: {"name": f"Bench {unique()}", "clientName": "Bench", "clientEmail": "bench@example.com",
+                      "clientPhone": "9800000000", "address": "1 Bench Road", "roles": roles}
+    return {
+        "POST /register": lambda i: ("POST", "/register", {"json": {
+            "username": f"bench{unique()}", "password": BENCH_PASSWORD, "role": "Supervisor"}}),
+        "POST /login": lambda i: ("POST", "/login", {"json": {"username": fx.username, "password": BENCH_PASSWORD}}),
+        "GET /projects": lambda i: ("GET", "/projects?limit=100", {}),
+        "GET /projects/": lambda i: ("GET", "/projects/?limit=100", {}),
+        "GET /projects/ (304)": lambda i: ("GET", "/projects/?limit=100", {"etag": True}),
+        "GET /projects/{id}": lambda i: ("GET", f"/projects/{project()}", {}),
+        "GET /projects/{id} (304)": lambda i: ("GET", f"/projects/{fx.project_ids[0]}", {"etag": True}),
+        "GET /projects/{id}/tasks/": lambda i: ("GET", f"/projects/{project()}/tasks/", {}),
+        "GET /users": lambda i: ("GET", "/users", {}),
+        "GET /test-tasks": lambda i: ("GET", "/test-tasks?limit=100", {}),
+        "GET /my-tasks": lambda i: ("GET", "/my-tasks", {}),
+        "GET /notifications": lambda i: ("GET", "/notifications?limit=100", {}),
+        "GET /notifications?unread": lambda i: ("GET", "/notifications?unread=true&limit=100", {}),
+        "GET /notifications/count": lambda i: ("GET", "/notifications/count", {}),
+        "GET /notifications/stream": lambda i: ("GET", "/notifications/stream?after=0", {}),
+        "GET /test-notifs": lambda i: ("GET", "/test-notifs?limit=100", {}),
+        "GET /jobs/metrics": lambda i: ("GET", "/jobs/metrics", {}),
+        "GET /analytics/summary": lambda i: ("GET", "/analytics/summary", {}),
+        "GET /search": lambda i: ("GET", f"/search?q={fx.search_term}", {}),
+        "GET /export/projects": lambda i: ("GET", "/export/projects", {}),
+        "GET /export/tasks?project_id": lambda i: ("GET", f"/export/tasks?project_id={project()}", {}),
+        "GET /export/tasks (ndjson)": lambda i: ("GET", "/export/tasks?format=ndjson&status=Blocked", {}),
+        "POST /projects/": lambda i: ("POST", f"/projects/?name=Bench%20{unique()}", {}),
+        "POST /projects/full-create": lambda i: ("POST", "/projects/full-create", {"json": full(i)}),
+        "POST /projects/batch-create (10)": lambda i: ("POST", "/projects/batch-create", {
+            "json": [full(i) for _ in range(10)]}),
+        "POST /projects/import (100)": lambda i: ("POST", "/projects/import?format=ndjson", {
+            "content": "".join(json.dumps(full(i)) + "\n" for _ in range(100))}),
+        "POST /projects/{id}/tasks/": lambda i: ("POST", f"/projects/{project()}/tasks/?name=Bench", {}),
+        "PATCH /tasks/{id}/status": lambda i: ("PATCH", f"/tasks/{task()}/status", {
+            "params": {"status": rng.choice(["In Progress", "Completed", "Pending"])}}),
+        "PATCH /tasks/status (20)": lambda i: ("PATCH", "/tasks/status", {"json": {"updates": [
+            {"task_id": task_id, "status": rng.choice(["In Progress", "Completed"])}
+            for task_id in rng.sample(fx.task_ids, min(20, len(fx.task_ids)))]}}),
+        "PATCH /projects/{id}/drawing-version": lambda i: ("PATCH", f"/projects/{project()}/drawing-version", {
+            "params": {"version": f"R{i}"}}),
+        "POST /notifications/mark-read": lambda i: ("POST", "/notifications/mark-read", {
+            "json": {"ids": rng.sample(fx.notification_ids, min(20, len(fx.notification_ids)))}}),
+        "POST /ai/analyze (cached)": lambda i: ("POST", "/ai/analyze", {
+            "json": {"projectName": fx.project_name, "prompt": "Summarize progress"}}),
+        "POST /ai/analyze (uncached)": lambda i: ("POST", "/ai/analyze", {
+            "json": {"projectName": fx.project_name, "prompt": f"Question {unique()}"}}),
+        "POST /ai/analyze/stream": lambda i: ("POST", "/ai/analyze/stream", {
+            "json": {"projectName": fx.project_name, "prompt": f"Question {unique()}"}}),
+        # Destructive scenarios last, each on its own reserved rows
+        "DELETE /notifications/{id}": lambda i: ("DELETE", f"/notifications/{fx.notification_ids.pop()}", {}),
+        "POST /notifications/bulk-delete": lambda i: ("POST", "/notifications/bulk-delete", {
+            "json": {"ids": [fx.notification_ids.pop() for _ in range(min(20, len(fx.notification_ids)))]}}),
+        "DELETE /tasks/{id}": lambda i: ("DELETE", f"/tasks/{fx.delete_task_ids.pop()}", {}),
+        "DELETE /projects/{id}": lambda i: ("DELETE", f"/projects/{fx.delete_project_ids.pop()}", {}),
+    }
+
+# Weighted request mix for the load phase: mostly dashboard reads, some status changes
+LOAD_MIX = {
+    "GET /projects/": 20, "GET /projects/ (304)": 10, "GET /projects/{id}": 20, "GET /projects/{id} (304)": 10,
+    "GET /my-tasks": 15, "GET /notifications": 10, "GET /notifications/count": 15,
+    "GET /analytics/summary": 3, "GET /search": 5, "PATCH /tasks/{id}/status": 5,
+    "POST /ai/analyze (cached)": 2,
+}
+
+class Runner:
+    def __init__(self, client, headers, metrics):
+        self.client = client
+        self.headers = headers
+        self.metrics = metrics
+        self.etags = {}
+
+    async def call(self, spec):
+        method, url, kwargs = spec
+        kwargs = dict(kwargs)
+        headers = dict(self.headers)
+        if kwargs.pop("etag", False):
+            if url not in self.etags:
+                self.etags[url] = (await self.client.get(url, headers=headers)).headers.get("etag")
+            headers["If-None-Match"] = self.etags[url]
+        start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                self.client.request(method, url, headers=headers, **kwargs), timeout=REQUEST_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            return time.perf_counter() - start, False
+        return time.perf_counter() - start, response.status_code < 400
+
+    async def route(self, make, iterations, warmup=3):
+        for i in range(warmup):
+            await self.call(make(i))
+        latencies, errors = [], 0
+        sql_before = self.metrics.sql_total
+        start = time.perf_counter()
+        for i in range(iterations):
+            elapsed, ok = await self.call(make(i))
+            latencies.append(elapsed)
+            errors += not ok
+        total = time.perf_counter() - start
+        return summarize(latencies, self.metrics.sql_total - sql_before, iterations, errors, total)
+
+    async def load(self, table, clients, seconds, rng):
+        names = list(LOAD_MIX)
+        weights = [LOAD_MIX[name] for name in names]
+        per_route = {name: [] for name in names}
+        errors = {name: 0 for name in names}
+        for name in names:  # prime the ETags outside the measured window
+            spec = table[name](0)
+            if spec[2].get("etag"):
+                await self.call(spec)
+        deadline = time.perf_counter() + seconds
+
+        async def client_loop(seed):
+            client_rng = random.Random(seed)
+            i = 0
+            while time.perf_counter() < deadline:
+                name = client_rng.choices(names, weights)[0]
+                elapsed, ok = await self.call(table[name](i))
+                per_route[name].append(elapsed)
+                errors[name] += not ok
+                i += 1
+
+        sql_before = self.metrics.sql_total
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(rng.random()) for _ in range(clients)))
+        total = time.perf_counter() - start
+        sql = self.metrics.sql_total - sql_before
+        every = [x for values in per_route.values() for x in values]
+        result = summarize(every, sql, len(every), sum(errors.values()), total)
+        result["clients"] = clients
+        result["routes"] = {
+            name: summarize(values, 0, len(values), errors[name], total) for name, values in per_route.items() if values
+        }
+        for stats in result["routes"].values():
+            del stats["sql_per_request"]  # statements can't be attributed per route under concurrency
+        return result
+
+async def run(args):
+    import itertools
+    import httpx
+    from sqlalchemy.orm import Session
+    import main
+    from ai_router import set_model
+    from auth import create_access_token
+    from database import engine
+    from metrics import metrics
+    from tests.fakes import FakeModel
+
+    set_model(FakeModel())
+
+    rng = random.Random(args.seed)
+    with Session(engine) as db:
+        fx = Fixture(db, args.iterations + 5)
+    table = scenarios(fx, rng, itertools.count(1))
+    main.NOTIFICATION_BACKLOG_LIMIT = STREAM_BACKLOG
+    # one DELETE plus a bulk delete of 20 per iteration (and per warmup call)
+    if len(fx.notification_ids) < STREAM_BACKLOG + (args.iterations + 3) * 21:
+        print(f"skipping GET /notifications/stream and notification deletes: {fx.username} has only "
+              f"{len(fx.notification_ids)} notifications (raise --notifications)\n")
+        for name in ("GET /notifications/stream", "DELETE /notifications/{id}", "POST /notifications/bulk-delete"):
+            del table[name]
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": fx.username})}
+
+    results = {"routes": {}, "load": None}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        runner = Runner(client, headers, metrics)
+        only = [name for name in table if not args.routes or any(r in name for r in args.routes)]
+        for name in only:
+            iterations = min(args.iterations, 10) if name in ("POST /register", "POST /login") else args.iterations
+            stats = await runner.route(table[name], iterations)
+            results["routes"][name] = stats
+            print(f"{name:<40} p50={stats['p50_ms']:8.2f}ms p95={stats['p95_ms']:8.2f}ms "
+                  f"p99={stats['p99_ms']:8.2f}ms {stats['rps']:8.1f} req/s  sql/req={stats['sql_per_request']:6.2f}"
+                  + (f"  errors={stats['errors']}" if stats["errors"] else ""))
+        if args.clients > 0 and args.seconds > 0:
+            load = await runner.load(table, args.clients, args.seconds, rng)
+            results["load"] = load
+            print(f"\nload: {args.clients} clients for {args.seconds:g}s  {load['rps']:.1f} req/s  "
+                  f"p50={load['p50_ms']:.2f}ms p95={load['p95_ms']:.2f}ms p99={load['p99_ms']:.2f}ms  "
+                  f"sql/req={load['sql_per_request']:.2f}  errors={load['errors']}")
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+def compare(baseline, current, threshold):
+    # Prints per-route changes; returns the names whose p50/p95 rose or rps fell past the threshold
+    regressions = []
+    pairs = [(name, baseline["routes"].get(name), stats) for name, stats in current["routes"].items()]
+    if baseline.get("load") and current.get("load"):
+        pairs.append(("load (all)", baseline["load"], current["load"]))
+    print(f"\ncompared with {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')}):")
+    for name, old, new in pairs:
+        if not old:
+            continue
+        changes = []
+        worse = False
+        for key, higher_is_worse in [("p50_ms", True), ("p95_ms", True), ("rps", False), ("sql_per_request", True)]:
+            if not old.get(key):
+                continue
+            delta = (new[key] - old[key]) / old[key]
+            changes.append(f"{key} {delta:+.0%}")
+            if (delta if higher_is_worse else -delta) > threshold:
+                worse = True
+        if worse:
+            regressions.append(name)
+        print(f"{'!!' if worse else '  '} {name:<40} " + "  ".join(changes))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--projects", type=int, default=1000)
+    parser.add_argument("--notifications", type=int, default=50000)
+    parser.add_argument("--iterations", type=int, default=50, help="sequential requests per route")
+    parser.add_argument("--clients", type=int, default=50, help="concurrent clients in the load phase (0 skips it)")
+    parser.add_argument("--seconds", type=float, default=10, help="length of the load phase")
+    parser.add_argument("--routes", nargs="*", help="only routes whose name contains one of these")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    # Configure before the app modules are imported: throwaway database, no worker threads
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ["JOB_WORKERS"] = "0"
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # The bench user's role is random; let it run the export scenarios whatever it is
+    os.environ.setdefault("EXPORT_ROLES", "")
+
+    import migrations
+    import models
+    from database import engine
+    from seed import seed
+
+    models.Base.metadata.create_all(bind=engine)
+    migrations.upgrade(engine)
+    start = time.perf_counter()
+    counts = seed(engine, args.users, args.projects, args.notifications, args.seed, BENCH_PASSWORD)
+    print(f"seeded {counts} in {time.perf_counter() - start:.1f}s\n")
+
+    results = asyncio.run(run(args))
+    results["meta"] = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "seeded": counts,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nresults written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) past {args.threshold:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Compares the old ILIKE '%...%' project lookup with the FTS5 search index.
+#
+# Usage (from dashboard-backend/): python -m benchmarks.search [--projects 100000]
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+import models
+from migrations import upgrade
+from search_router import search_projects
+
+WORDS = ["ambience", "tower", "lake", "residency", "heights", "plaza", "garden", "metro", "royal",
+         "crest", "vista", "park", "central", "harbor", "summit", "grand", "palm", "river"]
+CITIES = ["Pune", "Mumbai", "Delhi", "Chennai", "Nagpur", "Indore", "Surat", "Jaipur"]
+
+def seed(bench_engine, n_projects, rng):
+    rows = [
+        {
+            "name": f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {i}",
+            "client_name": f"{rng.choice(WORDS).title()} Builders",
+            "address": f"{rng.randint(1, 999)} {rng.choice(WORDS).title()} Road, {rng.choice(CITIES)}",
+        }
+        for i in range(n_projects)
+    ]
+    with bench_engine.begin() as conn:
+        for start in range(0, len(rows), 10000):
+            conn.execute(insert(models.Project), rows[start:start + 10000])
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--projects", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    bench_engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+    models.Base.metadata.create_all(bind=bench_engine)
+    upgrade(bench_engine)
+
+    start = time.perf_counter()
+    seed(bench_engine, args.projects, rng)
+    print(f"seeded {args.projects} projects (index maintained by triggers) in {time.perf_counter() - start:.1f}s")
+
+    with Session(bench_engine) as db:
+        for q in ["royal crest 4217", "harbor vis", "pune", "lake"]:
+            # The old lookup: an unindexable substring scan (all matches, since .first() was arbitrary)
+            ilike_ms, matches = timed(
+                lambda: db.query(models.Project.id).filter(models.Project.name.ilike(f"%{q}%")).all(), args.repeat
+            )
+            fts_ms, hits = timed(lambda: search_projects(db, q, limit=10), args.repeat)
+            print(f"{q!r:<20} ILIKE scan: {ilike_ms:8.2f} ms ({len(matches)} matches)   "
+                  f"FTS ranked top-10: {fts_ms:8.2f} ms ({len(hits)} hits)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# Compares the old response path (jsonable_encoder + stdlib json) with the response-model +
+# orjson path, and reports bytes on the wire raw / gzip / brotli for the same payloads.
+#
+# Usage (from dashboard-backend/): python -m benchmarks.serialization [--projects 2000]
+import argparse
+import gzip
+import random
+import time
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from responses import ORJSONResponse, GZIP_LEVEL, BROTLI_QUALITY, brotli, orjson
+from schemas import ProjectModel, MyTasksGroup
+from task_templates import get_template
+
+STATUSES = ["Pending", "In Progress", "Waiting for Approval", "Completed", "Blocked"]
+
+def project_list(n_projects, rng):
+    template = get_template("full-create")
+    task_id = 0
+    projects = []
+    for i in range(n_projects):
+        tasks = []
+        for spec in template:
+            task_id += 1
+            tasks.append({"id": task_id, "name": spec["name"], "status": rng.choice(STATUSES), "role": spec["role"]})
+        projects.append({"id": i + 1, "name": f"Project {i}", "tasks": tasks})
+    return projects
+
+def my_tasks(n_projects, rng):
+    template = get_template("full-create")
+    return [
+        {
+            "project_id": i + 1,
+            "project_name": f"Project {i}",
+            "tasks": [
+                {"id": i * 100 + j, "name": spec["name"], "status": rng.choice(STATUSES), "role": spec["role"],
+                 "who": spec.get("who"), "what": spec.get("what"), "when": spec.get("when"), "how": spec.get("how")}
+                for j, spec in enumerate(template)
+            ],
+        }
+        for i in range(n_projects)
+    ]
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--projects", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    if orjson is None:
+        print("orjson is not installed; the new path falls back to the stdlib encoder")
+    rng = random.Random(7)
+    for label, payload, model in [
+        ("/projects/", project_list(args.projects, rng), List[ProjectModel]),
+        ("/my-tasks", my_tasks(args.projects, rng), List[MyTasksGroup]),
+    ]:
+        adapter = TypeAdapter(model)
+        # Before: routes returned plain dicts, rendered by jsonable_encoder + json.dumps
+        old_ms, old_body = timed(lambda: JSONResponse(jsonable_encoder(payload)).body, args.repeat)
+        # After: validated against the response model, dumped to JSON-safe python, rendered by orjson
+        new_ms, new_body = timed(
+            lambda: ORJSONResponse(adapter.dump_python(adapter.validate_python(payload), mode="json")).body,
+            args.repeat,
+        )
+        gzip_ms, gzip_body = timed(lambda: gzip.compress(new_body, compresslevel=GZIP_LEVEL), args.repeat)
+        print(f"{label} ({len(payload)} projects)")
+        print(f"  jsonable_encoder + json : {old_ms:8.2f} ms  {len(old_body):>10,} bytes")
+        print(f"  response model + orjson : {new_ms:8.2f} ms  {len(new_body):>10,} bytes")
+        print(f"  gzip level {GZIP_LEVEL}            : {gzip_ms:8.2f} ms  {len(gzip_body):>10,} bytes")
+        if brotli is not None:
+            br_ms, br_body = timed(lambda: brotli.compress(new_body, quality=BROTLI_QUALITY), args.repeat)
+            print(f"  brotli quality {BROTLI_QUALITY}        : {br_ms:8.2f} ms  {len(br_body):>10,} bytes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import csv
+import io
+import json
+import os
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import exists, select
+from auth import get_current_user
+from database import SessionLocal
+from models import Notification, Project, RoleAssignment, Task
+from pagination import parse_fields
+from progress import PROGRESS_FIELDS
+
+try:
+    import orjson
+except ImportError:  # falls back to the stdlib encoder
+    orjson = None
+
+# Full-table exports as CSV or NDJSON, for spreadsheets and one-off analysis.
+#
+# Rows are streamed with a server-side cursor (yield_per), one chunk per EXPORT_BATCH_SIZE rows,
+# so memory stays flat at any table size and the response starts (CSV header first) before the
+# query has finished. The generator owns its own session, because the request's dependencies may
+# be torn down before the body is sent, and the whole export reads from one snapshot.
+#
+# Filters (all optional, combined with AND):
+#   project_id  the project, or for tasks/notifications the project of the task
+#   role        tasks with that role; projects with that role assigned; notifications on such tasks
+#   status      tasks with that status; projects having such a task; notifications on such tasks
+#   assignee    user id: the task's user, a role assigned on the project, the notification's recipient
+#
+# Exports include client contact details, so they need a signed-in user with one of EXPORT_ROLES
+# (comma-separated; set it empty to allow every signed-in user).
+
+router = APIRouter()
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_ROLES = {
+    role.strip()
+    for role in os.getenv("EXPORT_ROLES", "Director,Operation Head,Project Coordinator").split(",")
+    if role.strip()
+}
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+EXPORT_FIELDS = {
+    "projects": [
+        "id", "name", "address", "client_name", "client_email", "client_phone",
+        "drawing_number", "drawing_version", *PROGRESS_FIELDS,
+    ],
+    "tasks": ["id", "name", "status", "role", "project_id", "user_id", "who", "what", "when", "how"],
+    "notifications": ["id", "user_id", "message", "task_id", "read_at"],
+}
+MODELS = {"projects": Project, "tasks": Task, "notifications": Notification}
+
+def _task_filters(project_id, role, status, assignee):
+    filters = []
+    if project_id is not None:
+        filters.append(Task.project_id == project_id)
+    if role is not None:
+        filters.append(Task.role == role)
+    if status is not None:
+        filters.append(Task.status == status)
+    if assignee is not None:
+        filters.append(Task.user_id == assignee)
+    return filters
+
+def export_filters(entity, project_id=None, role=None, status=None, assignee=None):
+    if entity == "tasks":
+        return _task_filters(project_id, role, status, assignee)
+
+    if entity == "projects":
+        filters = []
+        if project_id is not None:
+            filters.append(Project.id == project_id)
+        if role is not None or assignee is not None:
+            assigned = [RoleAssignment.project_id == Project.id]
+            if role is not None:
+                assigned.append(RoleAssignment.role == role)
+            if assignee is not None:
+                assigned.append(RoleAssignment.user_id == assignee)
+            filters.append(exists().where(*assigned))
+        if status is not None:
+            filters.append(exists().where(Task.project_id == Project.id, Task.status == status))
+        return filters
+
+    filters = []
+    task_filters = _task_filters(project_id, role, status, None)
+    if task_filters:
+        filters.append(Notification.task_id.in_(select(Task.id).where(*task_filters)))
+    if assignee is not None:
+        filters.append(Notification.user_id == assignee)
+    return filters
+
+def export_statement(entity, field_names, filters):
+    model = MODELS[entity]
+    stmt = select(*[getattr(model, name) for name in field_names])
+    if filters:
+        stmt = stmt.where(*filters)
+    return stmt.order_by(model.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+def _csv_chunk(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+def _ndjson_chunk(field_names, rows):
+    if orjson is not None:
+        return b"".join(orjson.dumps(dict(zip(field_names, row))) + b"\n" for row in rows)
+    return "".join(json.dumps(dict(zip(field_names, row)), default=str) + "\n" for row in rows)
+
+def require_export_role(user=Depends(get_current_user)):
+    if EXPORT_ROLES and user.role not in EXPORT_ROLES:
+        raise HTTPException(status_code=403, detail="Not allowed to export")
+    return user
+
+def stream_export(stmt, field_names, fmt, session_factory=SessionLocal):
+    # Sync generator; StreamingResponse iterates it on the threadpool
+    if fmt == "csv":
+        yield _csv_chunk([field_names])
+    db = session_factory()
+    try:
+        for rows in db.execute(stmt).partitions():
+            yield _csv_chunk(rows) if fmt == "csv" else _ndjson_chunk(field_names, rows)
+    finally:
+        db.close()
+
+@router.get("/export/{entity}")
+def export(
+    entity: str,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    fields: Optional[str] = None,
+    project_id: Optional[int] = None,
+    role: Optional[str] = None,
+    status: Optional[str] = None,
+    assignee: Optional[int] = None,
+    user=Depends(require_export_role),
+):
+    if entity not in EXPORT_FIELDS:
+        raise HTTPException(status_code=404, detail=f"Unknown export {entity!r}")
+    field_names = parse_fields(fields, EXPORT_FIELDS[entity], EXPORT_FIELDS[entity])
+    stmt = export_statement(entity, field_names, export_filters(entity, project_id, role, status, assignee))
+    return StreamingResponse(
+        stream_export(stmt, field_names, format),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{entity}.{format}"',
+            "Cache-Control": "no-store",
+        },
+    )
@@ -0,0 +1,173 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from fastapi import APIRouter, HTTPException, Query, Request
+from pydantic import ValidationError
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+from database import SessionLocal
+from etags import bump_project_versions
+from models import User
+from project_writes import FULL_CREATE_TEMPLATE, insert_full_projects
+from schemas import ProjectCreateFull
+from task_templates import get_template
+from view_cache import view_cache
+
+# Bulk import of projects from spreadsheets (CSV) or NDJSON, for onboarding many at once.
+#
+# Every row is a ProjectCreateFull. NDJSON lines are that object as-is; CSV rows have the name,
+# clientName, clientEmail, clientPhone and address columns plus one column per role (named
+# exactly like the template role) holding the assigned user's id, empty for none.
+#
+# The input is read and validated IMPORT_CHUNK_SIZE rows at a time. Users are resolved once up
+# front, every valid row of a chunk is inserted by insert_full_projects() from project_writes.py
+# (one batch each for projects, role assignments and templated tasks), and each chunk commits on
+# its own, so a bad row or a failed chunk never undoes the rest. The result is a report with one entry per
+# rejected row; rows are numbered from 1 (CSV: after the header; NDJSON: the line number).
+# With dry_run the rows are only validated ("valid" counts them, nothing is created).
+#
+# HTTP: POST /projects/import?format=csv|ndjson[&dry_run=true] with the file as the raw body.
+# The body is spooled to a temporary file (in memory up to IMPORT_SPOOL_BYTES) and imported on
+# the threadpool.
+#
+# Usage: python import_router.py projects.csv [--format ndjson] [--dry-run] [--chunk 1000]
+
+router = APIRouter()
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+IMPORT_SPOOL_BYTES = int(os.getenv("IMPORT_SPOOL_BYTES", str(8 * 1024 * 1024)))
+
+PROJECT_COLUMNS = ("name", "clientName", "clientEmail", "clientPhone", "address")
+
+def _csv_record(record):
+    if None in record:
+        return ValueError(f"{len(record[None])} more values than header columns")
+    data = {column: record.get(column) for column in PROJECT_COLUMNS}
+    data["roles"] = [
+        {"role": column, "userId": value.strip()}
+        for column, value in record.items()
+        if column not in PROJECT_COLUMNS and value and value.strip()
+    ]
+    return data
+
+def read_records(fileobj, fmt):
+    # Yields (row number, dict) per input row, or (row number, exception) for unparseable ones
+    if fmt == "csv":
+        for row, record in enumerate(csv.DictReader(fileobj), start=1):
+            yield row, _csv_record(record)
+        return
+    for row, line in enumerate(fileobj, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield row, json.loads(line)
+        except ValueError as exc:
+            yield row, exc
+
+def _validation_messages(exc: ValidationError):
+    return [f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in exc.errors()]
+
+def validate_chunk(records, user_ids, roles):
+    # Splits a chunk into ([(row, ProjectCreateFull)], [{"row": n, "errors": [...]}])
+    valid, errors = [], []
+    for row, data in records:
+        if isinstance(data, Exception):
+            errors.append({"row": row, "errors": [f"row: {data}"]})
+            continue
+        try:
+            item = ProjectCreateFull.model_validate(data)
+        except ValidationError as exc:
+            errors.append({"row": row, "errors": _validation_messages(exc)})
+            continue
+        problems = [f"roles: unknown role {r.role!r}" for r in item.roles if r.role not in roles]
+        problems += [f"roles: user {r.userId} not found" for r in item.roles if r.userId not in user_ids]
+        if problems:
+            errors.append({"row": row, "errors": problems})
+        else:
+            valid.append((row, item))
+    return valid, errors
+
+def _chunks(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def import_projects(fileobj, fmt, dry_run=False, chunk_size=IMPORT_CHUNK_SIZE, session_factory=SessionLocal):
+    db = session_factory()
+    report = {"valid": 0, "created": 0, "failed": 0, "project_ids": [], "errors": []}
+    last_row = 0
+    try:
+        user_ids = set(db.execute(select(User.id)).scalars())
+        roles = {task["role"] for task in get_template(FULL_CREATE_TEMPLATE)}
+        try:
+            for chunk in _chunks(read_records(fileobj, fmt), chunk_size):
+                last_row = chunk[-1][0]
+                valid, errors = validate_chunk(chunk, user_ids, roles)
+                if valid and not dry_run:
+                    try:
+                        project_ids = insert_full_projects(db, [item for _, item in valid])
+                        bump_project_versions(db)
+                        db.commit()
+                    except Exception as exc:
+                        db.rollback()
+                        reason = f"insert failed: {getattr(exc, 'orig', exc)}"
+                        errors += [{"row": row, "errors": [reason]} for row, _ in valid]
+                        valid = []
+                    else:
+                        report["project_ids"].extend(project_ids)
+                        report["created"] += len(project_ids)
+                report["valid"] += len(valid)
+                report["failed"] += len(errors)
+                report["errors"].extend(sorted(errors, key=lambda error: error["row"]))
+        except (UnicodeDecodeError, csv.Error) as exc:
+            # Unreadable input: keep what was imported so far and report where reading stopped
+            report["failed"] += 1
+            report["errors"].append({"row": last_row + 1, "errors": [f"input: {exc}"]})
+    finally:
+        db.close()
+    if report["created"]:
+        view_cache.invalidate()
+    return report
+
+@router.post("/projects/import")
+async def import_projects_endpoint(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    dry_run: bool = False,
+):
+    spool = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES)
+    try:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        if spool.tell() == 0:
+            raise HTTPException(status_code=400, detail="Empty import")
+        spool.seek(0)
+        text = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+        return await run_in_threadpool(import_projects, text, format, dry_run)
+    finally:
+        spool.close()
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Bulk-import projects from CSV or NDJSON")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="default: from the file extension")
+    parser.add_argument("--dry-run", action="store_true", help="validate only, insert nothing")
+    parser.add_argument("--chunk", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    with open(args.path, encoding="utf-8-sig", newline="") as fileobj:
+        report = import_projects(fileobj, fmt, dry_run=args.dry_run, chunk_size=args.chunk)
+    for error in report["errors"]:
+        print(f"row {error['row']}: {'; '.join(error['errors'])}", file=sys.stderr)
+    print(f"Imported {report['created']} projects, {report['failed']} rows rejected")
@@ -1,3 +1,5 @@
 from database import engine
 from models import Base
+from migrations import upgrade
 Base.metadata.create_all(bind=engine)
+upgrade(engine)
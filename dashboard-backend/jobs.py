@@ -0,0 +1,220 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from sqlalchemy import func, or_, select, update
+from database import SessionLocal
+from models import Job
+
+# Local, persistent job queue backed by the jobs table (no outside broker).
+#
+# enqueue() only adds a row to the caller's session, so the job commits or rolls back together
+# with the change that produced it (transactional outbox). Worker threads claim due jobs with a
+# single UPDATE ... RETURNING, run the registered handler in a fresh session, delete the row on
+# success and otherwise retry with exponential backoff until max_attempts, after which the job
+# stays in the table with status "dead" for inspection.
+#
+# Handlers never commit: the handler's writes and the job's removal commit together, so a crash
+# can't leave work done with the job still queued to do it again. Side effects outside the
+# database (e.g. pushing notifications) go in a callable the handler returns, which runs only
+# after that commit.
+#
+# JOB_WORKERS=0 disables the in-process pool (e.g. to run `python jobs.py` as a separate worker).
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_SECONDS = float(os.getenv("JOB_BACKOFF_SECONDS", "2"))
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "300"))
+# A running job whose worker hasn't finished within the lease is assumed lost and re-claimed
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+
+logger = logging.getLogger("ambience.jobs")
+
+_handlers = {}
+
+def job_handler(kind):
+    # Registers fn(db, payload) as the handler for jobs of this kind; it may return a callable
+    # to run once its writes are committed
+    def register(fn):
+        _handlers[kind] = fn
+        return fn
+    return register
+
+def enqueue(db, kind, payload, delay=0, max_attempts=None):
+    now = datetime.utcnow()
+    db.add(Job(
+        kind=kind,
+        payload=json.dumps(payload),
+        status="pending",
+        attempts=0,
+        max_attempts=max_attempts or JOB_MAX_ATTEMPTS,
+        run_at=now + timedelta(seconds=delay),
+        created_at=now,
+    ))
+
+def backoff_delay(attempts):
+    base = min(JOB_BACKOFF_SECONDS * (2 ** (attempts - 1)), JOB_BACKOFF_MAX_SECONDS)
+    return base * random.uniform(0.5, 1.0)
+
+class JobQueue:
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.retried = 0
+        self.dead = 0
+        # Enqueue-to-completion latency of successful jobs, in seconds
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+
+    def claim(self, db):
+        now = datetime.utcnow()
+        due = (
+            select(Job.id)
+            .where(or_(
+                (Job.status == "pending") & (Job.run_at <= now),
+                (Job.status == "running") & (Job.started_at < now - timedelta(seconds=JOB_LEASE_SECONDS)),
+            ))
+            .order_by(Job.run_at, Job.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        row = db.execute(
+            update(Job)
+            .where(Job.id == due)
+            .values(status="running", started_at=now, attempts=Job.attempts + 1)
+            .returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts, Job.created_at)
+        ).first()
+        db.commit()
+        return row
+
+    def run_once(self):
+        # Claims and runs at most one due job; returns False when nothing was due
+        db = self.session_factory()
+        try:
+            job = self.claim(db)
+            if job is None:
+                return False
+            try:
+                handler = _handlers.get(job.kind)
+                if handler is None:
+                    raise LookupError(f"No handler registered for job kind {job.kind!r}")
+                after_commit = handler(db, json.loads(job.payload))
+                db.query(Job).filter(Job.id == job.id).delete(synchronize_session=False)
+                db.commit()
+            except Exception:
+                db.rollback()
+                self._record_failure(db, job, traceback.format_exc())
+                return True
+            self._record_success(job)
+            if after_commit is not None:
+                try:
+                    after_commit()
+                except Exception:
+                    # The job's writes are committed and it is gone from the queue; nothing to retry
+                    logger.exception("job after-commit callback failed", extra={"job_id": job.id, "kind": job.kind})
+            return True
+        finally:
+            db.close()
+
+    def _record_success(self, job):
+        latency = (datetime.utcnow() - job.created_at).total_seconds()
+        with self._lock:
+            self.completed += 1
+            self.latency_sum += latency
+            self.latency_max = max(self.latency_max, latency)
+
+    def _record_failure(self, db, job, error):
+        values = {"last_error": error[-4000:]}
+        if job.attempts >= job.max_attempts:
+            values["status"] = "dead"
+        else:
+            values["status"] = "pending"
+            values["run_at"] = datetime.utcnow() + timedelta(seconds=backoff_delay(job.attempts))
+        db.query(Job).filter(Job.id == job.id).update(values, synchronize_session=False)
+        db.commit()
+        logger.warning("job failed", extra={
+            "job_id": job.id, "kind": job.kind, "attempt": job.attempts, "next_status": values["status"],
+        })
+        with self._lock:
+            if values["status"] == "dead":
+                self.dead += 1
+            else:
+                self.retried += 1
+
+    def drain(self, limit=1000):
+        # Runs due jobs on the calling thread until none are left (scripts, benchmarks)
+        ran = 0
+        while ran < limit and self.run_once():
+            ran += 1
+        return ran
+
+    def wake(self):
+        # Called after a commit that enqueued jobs, so idle workers don't wait for the next poll
+        self._wake.set()
+
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception:
+                logger.exception("job worker loop failed")
+            self._wake.wait(JOB_POLL_SECONDS)
+            self._wake.clear()
+
+    def start(self, workers=JOB_WORKERS):
+        self._stop.clear()
+        for i in range(workers):
+            thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def stats(self, db):
+        counts = dict(db.query(Job.status, func.count(Job.id)).group_by(Job.status).all())
+        oldest = db.query(func.min(Job.created_at)).filter(Job.status == "pending").scalar()
+        with self._lock:
+            return {
+                "depth": counts.get("pending", 0) + counts.get("running", 0),
+                "pending": counts.get("pending", 0),
+                "running": counts.get("running", 0),
+                "dead": counts.get("dead", 0),
+                "oldest_pending_age_seconds": (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0,
+                "completed": self.completed,
+                "retried": self.retried,
+                "dead_lettered": self.dead,
+                "latency_avg_seconds": self.latency_sum / self.completed if self.completed else 0.0,
+                "latency_max_seconds": self.latency_max,
+                "workers": len(self._threads),
+            }
+
+job_queue = JobQueue()
+
+if __name__ == "__main__":
+    # Standalone worker process: python jobs.py (handlers are registered by importing main)
+    # Import through the module name so this shares main's handler registry and queue
+    import main  # noqa: F401
+    from jobs import job_queue as worker_queue
+
+    worker_queue.start(max(JOB_WORKERS, 1))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        worker_queue.stop()
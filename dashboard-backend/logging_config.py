@@ -0,0 +1,55 @@
+import json
+import logging
+import os
+import sys
+
+# Leveled, structured application logging.
+# Application loggers live under "ambience" (e.g. "ambience.tasks"); context goes in extra={...}
+# and is rendered as key=value pairs (LOG_FORMAT=text) or one JSON object per line (LOG_FORMAT=json).
+# Hot-path call sites log at DEBUG behind logger.isEnabledFor(), so at the default INFO level they
+# cost a level check and nothing else. Only the "ambience" tree is configured; SQLAlchemy,
+# uvicorn etc. keep their own levels.
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+APP_LOGGER = "ambience"
+
+# Attributes every LogRecord has; anything else on a record came from extra={...}
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+def _extras(record):
+    return {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS}
+
+class KeyValueFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        extras = _extras(record)
+        if extras:
+            line += " " + " ".join(f"{k}={v!r}" if isinstance(v, str) else f"{k}={v}" for k, v in extras.items())
+        return line
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **_extras(record),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def configure_logging(level=LOG_LEVEL, fmt=LOG_FORMAT):
+    logger = logging.getLogger(APP_LOGGER)
+    logger.setLevel(level)
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(JsonFormatter() if fmt == "json" else KeyValueFormatter())
+        logger.addHandler(handler)
+        logger.propagate = False
+    return logger
@@ -1,184 +1,148 @@
-from fastapi import FastAPI, HTTPException, Depends, Header
-from sqlalchemy.orm import Session
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, Response
+from sqlalchemy import case, delete, event, func, insert, literal, null, select, union, update
+from sqlalchemy.orm import Session, selectinload, joinedload, load_only
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+from datetime import datetime
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 import google.generativeai as genai
+import asyncio
+import json
+import logging
 import os
-from database import SessionLocal, engine, Base
-from models import Project, Task, User, Notification
+from database import SessionLocal, engine, Base, get_db, get_async_db
+from models import Project, Task, User, Notification, RoleAssignment
 from fastapi import Body
-from auth import hash_password, verify_password, create_access_token, decode_access_token
+from auth import (
+    create_access_token,
+    hash_password_async, verify_and_update_password_async,
+    PasswordHashPoolBusy, PASSWORD_HASH_RETRY_AFTER,
+    invalidate_user, get_current_user, get_current_user_async, resolve_user,
+)
 from ai_router import router as ai_router
-from schemas import ProjectCreateFull
+from schemas import (
+    ProjectCreateFull, NotificationBulkAction, BulkTaskStatusUpdate,
+    ProjectModel, ProjectDetail, MyTasksGroup, ProjectRecord, TaskRecord, UserRecord, NotificationRecord,
+)
 from fastapi import Query
-from ai_router import router as ai_router
-app = FastAPI()
+from ai_router import router as ai_router, invalidate_project as invalidate_ai_analysis
+from analytics_router import router as analytics_router
+from search_router import router as search_router
+from export_router import router as export_router
+from import_router import router as import_router
+from project_writes import insert_full_projects
+from pagination import Page, NEXT_CURSOR_HEADER, parse_fields, fetch_page, fetch_page_async
+from task_templates import get_template, build_task_rows
+from notification_hub import hub as notification_hub
+from jobs import enqueue, job_handler, job_queue
+from responses import ORJSONResponse, CompressionMiddleware
+from metrics import MetricsMiddleware
+from migrations import database_identity
+from metrics_router import router as metrics_router
+from logging_config import configure_logging
+from progress import PROGRESS_FIELDS, ProgressDeltas
+from etags import PROJECTS, bump_project_versions, table_version_stmt, project_version_stmt, make_etag, conditional
+from view_cache import view_cache, render_json, cached_response, ALL_PROJECTS, project_tag
+configure_logging()
+logger = logging.getLogger("ambience.tasks")
+
+app = FastAPI(default_response_class=ORJSONResponse)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # allow all for now
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
 app.include_router(ai_router)
+app.include_router(analytics_router)
+app.include_router(search_router)
+app.include_router(export_router)
+app.include_router(import_router)
+app.include_router(metrics_router)
+
+@app.exception_handler(PasswordHashPoolBusy)
+def password_hash_pool_busy(request, exc):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server busy, please retry"},
+        headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER)},
+    )
 
 def generate_default_tasks(project_id, db):
-    default_tasks = [
-        {
-            "name": "Receive Order", "role": "Project Coordinator",
-            "who": "Project Coordinator",
-            "what": "Receive client order and confirm it in the system",
-            "when": "At the start of the project",
-            "how": "Via client call/email and enter into dashboard"
-        },
-        {
-            "name": "Get Drawing Approved", "role": "Project Engineer",
-            "who": "Project Engineer",
-            "what": "Submit design for approval by client",
-            "when": "After order confirmation",
-            "how": "Upload CAD files or drawings and notify client"
-        },
-        {
-            "name": "Kick-off Meeting", "role": "Supervisor",
-            "who": "Supervisor",
-            "what": "Conduct initial meeting with stakeholders",
-            "when": "Before execution begins",
-            "how": "Schedule meeting, set agenda, share link/invite"
-        },
-        {
-            "name": "Send Electrical Load", "role": "Project Engineer",
-            "who": "Project Engineer",
-            "what": "Calculate and share estimated electrical load",
-            "when": "Before procurement starts",
-            "how": "Use internal tools and email to vendor/client"
-        },
-        {
-            "name": "Prepare Estimation", "role": "Measurement Engineer",
-            "who": "Measurement Engineer",
-            "what": "Estimate project cost and resource needs",
-            "when": "After load calculation",
-            "how": "Use templates and update the dashboard"
-        },
-        {
-            "name": "Approve Estimation", "role": "Operation Head",
-            "who": "Operation Head",
-            "what": "Review and approve estimation",
-            "when": "Post estimation submission",
-            "how": "Check against budget and approve in dashboard"
-        },
-        {
-            "name": "Raise PO", "role": "Purchase Coordinator",
-            "who": "Purchase Coordinator",
-            "what": "Create and submit Purchase Order",
-            "when": "After estimation approval",
-            "how": "Use company PO tool and send to vendors"
-        },
-        {
-            "name": "Approve PO", "role": "Director",
-            "who": "Director",
-            "what": "Review and approve raised Purchase Order",
-            "when": "After PO is raised",
-            "how": "Check details in PO and sign-off in system"
-        },
-        {
-            "name": "Upload RFQ", "role": "Purchase Coordinator",
-            "who": "Purchase Coordinator",
-            "what": "Upload Request for Quotation to system",
-            "when": "After PO approval",
-            "how": "Gather vendor quotes and upload to dashboard"
-        },
-        {
-            "name": "Vendor Follow-ups", "role": "Purchase Coordinator",
-            "who": "Purchase Coordinator",
-            "what": "Follow up with vendors for quotes/delivery",
-            "when": "After RFQ is sent",
-            "how": "Email and call vendors regularly"
-        },
-        {
-            "name": "Prepare Delivery Challan", "role": "Store Coordinator",
-            "who": "Store Coordinator",
-            "what": "Create delivery documentation",
-            "when": "Before dispatch of goods",
-            "how": "Use delivery challan format and print it"
-        },
-        {
-            "name": "Receive Material", "role": "Store Coordinator",
-            "who": "Store Coordinator",
-            "what": "Physically receive and verify materials",
-            "when": "Upon delivery",
-            "how": "Check items, sign delivery challan, upload to system"
-        },
-        {
-            "name": "Upload Invoice", "role": "Purchase Coordinator",
-            "who": "Purchase Coordinator",
-            "what": "Scan and upload vendor invoice",
-            "when": "After material receipt",
-            "how": "Use scanner and upload PDF to dashboard"
-        },
-        {
-            "name": "Upload Measurement", "role": "Measurement Engineer",
-            "who": "Measurement Engineer",
-            "what": "Measure completed work and upload data",
-            "when": "After job completion",
-            "how": "Use on-site tools and submit via dashboard"
-        },
-        {
-            "name": "Final Approvals", "role": "Operation Head",
-            "who": "Operation Head",
-            "what": "Give final sign-off on all project deliverables",
-            "when": "At project closure",
-            "how": "Cross-check all tasks and click approve"
-        }
-    ]
-
-    for task_data in default_tasks:
-        task = Task(
-            name=task_data["name"],
-            role=task_data["role"],
-            status="Pending",
-            project_id=project_id,
-            who=task_data["who"],
-            what=task_data["what"],
-            when=task_data["when"],
-            how=task_data["how"]
-        )
-        db.add(task)
+    # One executemany INSERT for the whole template; the caller commits
+    rows = build_task_rows(get_template("default"), project_id)
+    db.execute(insert(Task), rows)
+    progress = ProgressDeltas()
+    progress.added_rows(rows)
+    progress.apply(db)
+
+def create_projects_bulk(items: List[ProjectCreateFull], db: Session):
+    # Creates projects, their role assignments and templated tasks in a constant number of
+    # statements: one IN query for every referenced user, then one INSERT batch per table.
+    user_ids = {role.userId for item in items for role in item.roles}
+    found = {uid for (uid,) in db.query(User.id).filter(User.id.in_(user_ids))} if user_ids else set()
+    for item in items:
+        for role in item.roles:
+            if role.userId not in found:
+                raise HTTPException(status_code=404, detail=f"User with ID {role.userId} not found")
+
+    project_ids = insert_full_projects(db, items)
+    bump_project_versions(db)
     db.commit()
+    view_cache.invalidate()
+    return project_ids
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 # Register model
 class UserCreate(BaseModel):
     username: str
     password: str
     role: str
 
-@app.get("/projects")
-def list_projects(db: Session = Depends(get_db)):
-    projects = db.query(Project).all()
-    return [{"id": p.id, "name": p.name} for p in projects]
+# GET /projects is unauthenticated, so it only offers what it always exposed (id, name) plus the
+# progress counters; client contact details stay behind the authenticated routes
+PROJECT_FIELDS = ["id", "name", *PROGRESS_FIELDS]
+TASK_FIELDS = ["id", "name", "status", "role", "project_id", "user_id", "who", "what", "when", "how"]
+USER_FIELDS = ["id", "username", "role"]
+NOTIFICATION_FIELDS = ["id", "user_id", "message", "task_id", "read_at"]
+
+@app.get("/projects", response_model=List[ProjectRecord], response_model_exclude_unset=True)
+def list_projects(
+    response: Response,
+    page: Page = Depends(),
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    field_names = parse_fields(fields, PROJECT_FIELDS, ["id", "name"])
+    rows = fetch_page(db, Project, page, field_names)
+    page.set_next(response, rows)
+    return rows
 
 
+# /register and /login are async so bcrypt can be awaited in the hash process pool;
+# their (short) database work still runs on the threadpool.
 @app.post("/register")
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.username == user.username).first():
+async def register(user: UserCreate, db: Session = Depends(get_db)):
+    def username_taken():
+        return db.query(User.id).filter(User.username == user.username).first() is not None
+
+    if await run_in_threadpool(username_taken):
         raise HTTPException(status_code=400, detail="Username already exists")
-    
-    db_user = User(
-        username=user.username,
-        password_hash=hash_password(user.password),
-        role=user.role
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+
+    password_hash = await hash_password_async(user.password)
+
+    def save_user():
+        db.add(User(username=user.username, password_hash=password_hash, role=user.role))
+        db.commit()
+
+    await run_in_threadpool(save_user)
     return {"message": "User registered successfully"}
 
 # Login model
@@ -187,39 +151,72 @@ class LoginInput(BaseModel):
     password: str
 
 @app.post("/login")
-def login(input: LoginInput = Body(...), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == input.username).first()
-    if not user or not verify_password(input.password, user.password_hash):
+async def login(input: LoginInput = Body(...), db: Session = Depends(get_db)):
+    user = await run_in_threadpool(lambda: db.query(User).filter(User.username == input.username).first())
+    if not user:
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
+    verified, new_hash = await verify_and_update_password_async(input.password, user.password_hash)
+    if not verified:
+        raise HTTPException(status_code=400, detail="Invalid credentials")
+
+    if new_hash:
+        # Hash was made with older cost parameters; upgrade it transparently
+        user.password_hash = new_hash
+        await run_in_threadpool(db.commit)
+
     token = create_access_token({"sub": user.username, "role": user.role})
     return {"access_token": token, "token_type": "bearer"}
 # Create Project
-@app.post("/projects/")
+@app.post("/projects/", response_model=ProjectRecord)
 def create_project(name: str, db: Session = Depends(get_db)):
     project = Project(name=name)
     db.add(project)
-    db.commit()
-    db.refresh(project)
+    db.flush()
 
-    # 🔥 AUTO-GENERATE TASKS HERE:
+    # 🔥 AUTO-GENERATE TASKS HERE (same transaction as the project row):
     generate_default_tasks(project.id, db)
+    bump_project_versions(db)
+    db.commit()
+    view_cache.invalidate()
+    db.refresh(project)
 
     return project
 
 
 # Read all Projects
-@app.get("/projects/")
-def read_projects(db: Session = Depends(get_db)):
-    projects = db.query(Project).all()
-    result = []
-    for project in projects:
-        result.append({
-            "id": project.id,
-            "name": project.name,
-            "tasks": [{"id": t.id, "name": t.name, "status": t.status, "role": t.role} for t in project.tasks]
-        })
-    return result
+@app.get("/projects/", response_model=List[ProjectModel])
+async def read_projects(
+    request: Request,
+    response: Response,
+    page: Page = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    version = await db.scalar(table_version_stmt())
+    etag = make_etag(PROJECTS, version or 0, page.after, page.limit)
+    not_modified = conditional(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    async def render():
+        # selectinload fetches every project's tasks in one extra query instead of one per project;
+        # load_only keeps the who/what/when/how text out of this listing
+        stmt = select(Project).options(
+            load_only(Project.id, Project.name),
+            selectinload(Project.tasks).load_only(Task.id, Task.name, Task.status, Task.role),
+        )
+        projects = (await db.execute(page.apply(stmt, Project.id))).scalars().all()
+        result = []
+        for project in projects:
+            result.append({
+                "id": project.id,
+                "name": project.name,
+                "tasks": [{"id": t.id, "name": t.name, "status": t.status, "role": t.role} for t in project.tasks]
+            })
+        headers = {NEXT_CURSOR_HEADER: str(result[-1]["id"])} if len(result) == page.limit else {}
+        return headers, render_json(List[ProjectModel], result)
+
+    return cached_response(await view_cache.get_or_render(etag, ALL_PROJECTS, render), response)
 # @app.patch("/tasks/{task_id}/status")
 # def update_task_status(task_id: int, status: str, db: Session = Depends(get_db)):
 #     task = db.query(Task).filter(Task.id == task_id).first()
@@ -232,36 +229,60 @@ def read_projects(db: Session = Depends(get_db)):
 #     return task
 
 
-@app.get("/projects/{project_id}")
-def get_project(project_id: int, db: Session = Depends(get_db)):
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
+@app.get("/projects/{project_id}", response_model=ProjectDetail)
+async def get_project(
+    project_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
+    version = await db.scalar(project_version_stmt(project_id))
+    if version is None:
         raise HTTPException(status_code=404, detail="Project not found")
+    etag = make_etag("project", project_id, version)
+    not_modified = conditional(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    async def render():
+        stmt = select(Project).options(selectinload(Project.tasks)).where(Project.id == project_id)
+        project = (await db.execute(stmt)).scalars().first()
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+
+        return {}, render_json(ProjectDetail, {
+            "id": project.id,
+            "name": project.name,
+            "drawing_number": project.drawing_number,
+            "drawing_version": project.drawing_version,
+            "tasks": [
+                {
+                    "id": t.id,
+                    "name": t.name,
+                    "status": t.status,
+                    "role": t.role,
+                    "who": t.who,
+                    "what": t.what,
+                    "when": t.when,
+                    "how": t.how
+                }
+                for t in project.tasks
+            ]
+        })
 
-    return {
-        "id": project.id,
-        "name": project.name,
-        "drawing_number": project.drawing_number,
-        "drawing_version": project.drawing_version,
-        "tasks": [
-            {
-                "id": t.id,
-                "name": t.name,
-                "status": t.status,
-                "role": t.role,
-                "who": t.who,
-                "what": t.what,
-                "when": t.when,
-                "how": t.how
-            }
-            for t in project.tasks
-        ]
-    }
-
-@app.get("/users")
-def get_all_users(db: Session = Depends(get_db)):
-    users = db.query(User).all()
-    return [{"id": u.id, "username": u.username, "role": u.role} for u in users]
+    return cached_response(await view_cache.get_or_render(etag, project_tag(project_id), render), response)
+
+@app.get("/users", response_model=List[UserRecord], response_model_exclude_unset=True)
+def get_all_users(
+    response: Response,
+    page: Page = Depends(),
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    field_names = parse_fields(fields, USER_FIELDS, USER_FIELDS)
+    rows = fetch_page(db, User, page, field_names)
+    page.set_next(response, rows)
+    return rows
 # Delete Project
 @app.delete("/projects/{project_id}")
 def delete_project(project_id: int, db: Session = Depends(get_db)):
@@ -269,204 +290,134 @@ def delete_project(project_id: int, db: Session = Depends(get_db)):
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     db.delete(project)
+    bump_project_versions(db)
     db.commit()
+    invalidate_ai_analysis(project_id)
+    view_cache.invalidate([project_id])
     return {"message": "Project deleted"}
 # Create Task
-@app.post("/projects/{project_id}/tasks/")
+@app.post("/projects/{project_id}/tasks/", response_model=TaskRecord)
 def create_task(project_id: int, name: str, db: Session = Depends(get_db)):
     task = Task(name=name, project_id=project_id)
     db.add(task)
+    progress = ProgressDeltas()
+    progress.added(project_id)
+    progress.apply(db)
+    bump_project_versions(db, [project_id])
     db.commit()
     db.refresh(task)
+    invalidate_ai_analysis(project_id)
+    view_cache.invalidate([project_id])
     return task
 
 # Get Tasks for Project
-@app.get("/projects/{project_id}/tasks/")
-def get_tasks(project_id: int, db: Session = Depends(get_db)):
-    return db.query(Task).filter(Task.project_id == project_id).all()
+@app.get("/projects/{project_id}/tasks/", response_model=List[TaskRecord], response_model_exclude_unset=True)
+def get_tasks(
+    project_id: int,
+    response: Response,
+    page: Page = Depends(),
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    field_names = parse_fields(fields, TASK_FIELDS, TASK_FIELDS)
+    rows = fetch_page(db, Task, page, field_names, Task.project_id == project_id)
+    page.set_next(response, rows)
+    return rows
+
+# Task writes that move the progress counters are compare-and-set: the UPDATE/DELETE only
+# matches while the task still has the status the delta was computed from, so two concurrent
+# changes can't both move the counters away from the same old status. A write that matches
+# nothing records no delta; single-task routes re-read and retry, bulk updates report it.
+TASK_WRITE_ATTEMPTS = 3
+TASK_CHANGED_DETAIL = "Task was changed concurrently, please retry"
+
+def set_task_statuses(db: Session, rows, status_by_id, progress: ProgressDeltas):
+    # rows: (id, project_id, status) as read; one UPDATE per (old, new) status pair.
+    # Returns the ids that were changed.
+    groups = {}
+    for row in rows:
+        groups.setdefault((row.status, status_by_id[row.id]), []).append(row.id)
+    tasks = Task.__table__
+    changed = set()
+    for (old_status, status), task_ids in groups.items():
+        changed.update(db.execute(
+            update(tasks)
+            .where(tasks.c.id.in_(task_ids), tasks.c.status.is_not_distinct_from(old_status))
+            .values(status=status)
+            .returning(tasks.c.id)
+        ).scalars())
+    for row in rows:
+        if row.id in changed:
+            progress.moved(row.project_id, row.status, status_by_id[row.id])
+    return changed
 
 # Delete Task
 @app.delete("/tasks/{task_id}")
 def delete_task(task_id: int, db: Session = Depends(get_db)):
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    db.delete(task)
+    tasks = Task.__table__
+    for _ in range(TASK_WRITE_ATTEMPTS):
+        task = db.query(Task.id, Task.project_id, Task.status).filter(Task.id == task_id).first()
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+        deleted = db.execute(
+            delete(tasks).where(tasks.c.id == task.id, tasks.c.status.is_not_distinct_from(task.status))
+        ).rowcount
+        if deleted:
+            break
+    else:
+        raise HTTPException(status_code=409, detail=TASK_CHANGED_DETAIL)
+    project_id = task.project_id
+    progress = ProgressDeltas()
+    progress.removed(project_id, task.status)
+    progress.apply(db)
+    bump_project_versions(db, [project_id])
     db.commit()
+    invalidate_ai_analysis(project_id)
+    view_cache.invalidate([project_id])
     return {"message": "Task deleted"}
 
-def get_current_user(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Missing token")
-    
-    token = authorization.split(" ")[1]
-    payload = decode_access_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-
-    user = db.query(User).filter(User.username == payload["sub"]).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-    
-    return user
+def with_session(fn, *args):
+    # Runs fn(*args, db=...) on a session that is closed as soon as it returns, for work that must
+    # not keep a pooled connection for the life of a long response
+    db = SessionLocal()
+    try:
+        return fn(*args, db=db)
+    finally:
+        db.close()
 
-@app.get("/test-tasks")
-def test_tasks(db: Session = Depends(get_db)):
-    return db.query(Task).all()
+# Any ORM change to a user (role edit, delete) drops their cached tokens
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_cached_user(mapper, connection, target):
+    invalidate_user(target.id)
+
+@app.get("/test-tasks", response_model=List[TaskRecord], response_model_exclude_unset=True)
+def test_tasks(
+    response: Response,
+    page: Page = Depends(),
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    field_names = parse_fields(fields, TASK_FIELDS, TASK_FIELDS)
+    rows = fetch_page(db, Task, page, field_names)
+    page.set_next(response, rows)
+    return rows
 
 @app.post("/projects/full-create")
 def create_full_project(data: ProjectCreateFull, db: Session = Depends(get_db)):
-    # Step 1: Create the Project
-    new_project = Project(
-        name=data.name,
-        client_name=data.clientName,
-        client_email=data.clientEmail,
-        client_phone=data.clientPhone,
-        address=data.address
-    )
-    db.add(new_project)
-    db.commit()
-    db.refresh(new_project)
-
-    # Updated FCM with extra details
-    default_tasks = [
-    {
-        "name": "Receive Order", "role": "Project Coordinator",
-        "who": "Project Coordinator",
-        "what": "Receive client order and confirm it in the system",
-        "when": "At the start of the project",
-        "how": "Via client call/email, enter order into dashboard"
-    },
-    {
-        "name": "Get Drawing Approved", "role": "Project Engineer",
-        "who": "Project Engineer",
-        "what": "Submit design for approval",
-        "when": "After initial planning",
-        "how": "Share CAD files or blueprints with client"
-    },
-    {
-        "name": "Kick-off Meeting", "role": "Supervisor",
-        "who": "Supervisor",
-        "what": "Conduct the kick-off meeting with all stakeholders",
-        "when": "After order confirmation",
-        "how": "Schedule meeting, set agenda, send invites"
-    },
-    {
-        "name": "Send Electrical Load", "role": "Project Engineer",
-        "who": "Project Engineer",
-        "what": "Send the estimated electrical load to the vendor",
-        "when": "Before material procurement",
-        "how": "Use estimation tools and email the results"
-    },
-    {
-        "name": "Prepare Estimation", "role": "Measurement Engineer",
-        "who": "Measurement Engineer",
-        "what": "Estimate project cost and resource needs",
-        "when": "After load calculation",
-        "how": "Use templates and update the dashboard"
-    },
-    {
-        "name": "Approve Estimation", "role": "Operation Head",
-        "who": "Operation Head",
-        "what": "Review and approve estimation",
-        "when": "Post estimation submission",
-        "how": "Check against budget and approve in dashboard"
-    },
-    {
-        "name": "Raise PO", "role": "Purchase Coordinator",
-        "who": "Purchase Coordinator",
-        "what": "Create and submit Purchase Order",
-        "when": "After estimation approval",
-        "how": "Use company PO tool and send to vendors"
-    },
-    {
-        "name": "Approve PO", "role": "Director",
-        "who": "Director",
-        "what": "Review and approve raised Purchase Order",
-        "when": "After PO is raised",
-        "how": "Check details in PO and sign-off in system"
-    },
-    {
-        "name": "Upload RFQ", "role": "Purchase Coordinator",
-        "who": "Purchase Coordinator",
-        "what": "Upload Request for Quotation to system",
-        "when": "After PO approval",
-        "how": "Gather vendor quotes and upload to dashboard"
-    },
-    {
-        "name": "Vendor Follow-ups", "role": "Purchase Coordinator",
-        "who": "Purchase Coordinator",
-        "what": "Follow up with vendors for quotes/delivery",
-        "when": "After RFQ is sent",
-        "how": "Email and call vendors regularly"
-    },
-    {
-        "name": "Prepare Delivery Challan", "role": "Store Coordinator",
-        "who": "Store Coordinator",
-        "what": "Create delivery documentation",
-        "when": "Before dispatch of goods",
-        "how": "Use delivery challan format and print it"
-    },
-    {
-        "name": "Receive Material", "role": "Store Coordinator",
-        "who": "Store Coordinator",
-        "what": "Physically receive and verify materials",
-        "when": "Upon delivery",
-        "how": "Check items, sign delivery challan, upload to system"
-    },
-    {
-        "name": "Upload Invoice", "role": "Purchase Coordinator",
-        "who": "Purchase Coordinator",
-        "what": "Scan and upload vendor invoice",
-        "when": "After material receipt",
-        "how": "Use scanner and upload PDF to dashboard"
-    },
-    {
-        "name": "Upload Measurement", "role": "Measurement Engineer",
-        "who": "Measurement Engineer",
-        "what": "Measure completed work and upload data",
-        "when": "After job completion",
-        "how": "Use on-site tools and submit via dashboard"
-    },
-    {
-        "name": "Final Approvals", "role": "Operation Head",
-        "who": "Operation Head",
-        "what": "Give final sign-off on all project deliverables",
-        "when": "At project closure",
-        "how": "Cross-check all tasks and click approve"
-    }
-]
-    # Create mapping: role ➝ userId
-    role_user_map = {role.role: role.userId for role in data.roles}
-
-    for task_data in default_tasks:
-        role = task_data["role"]
-        if role in role_user_map:
-            user = db.query(User).filter(User.id == role_user_map[role]).first()
-            if not user:
-                raise HTTPException(status_code=404, detail=f"User with ID {role_user_map[role]} not found")
-
-            task = Task(
-                name=task_data["name"],
-                role=role,
-                user_id=user.id,
-                project_id=new_project.id,
-                who=task_data["who"],
-                what=task_data["what"],
-                when=task_data["when"],
-                how=task_data["how"]
-            )
-            db.add(task)
+    project_id, = create_projects_bulk([data], db)
+    return {"message": "Project and detailed tasks created successfully", "project_id": project_id}
 
-    db.commit()
-    for t in db.query(Task).filter(Task.project_id == new_project.id).all():
-        print(t.name, t.who, t.what)
-    return {"message": "Project and detailed tasks created successfully", "project_id": new_project.id}
+@app.post("/projects/batch-create")
+def create_projects_batch(data: List[ProjectCreateFull], db: Session = Depends(get_db)):
+    project_ids = create_projects_bulk(data, db)
+    return {"message": f"{len(project_ids)} projects created successfully", "project_ids": project_ids}
 
-@app.get("/my-tasks")
-def get_my_tasks(user=Depends(get_current_user), db: Session = Depends(get_db)):
-    tasks = db.query(Task).filter(Task.user_id == user.id).all()
+def my_tasks_stmt(user_id: int):
+    # Join the parent project in the same query so task.project doesn't lazy-load per task
+    return select(Task).options(joinedload(Task.project)).where(Task.user_id == user_id)
 
+def group_my_tasks(tasks):
     project_map = {}
     for task in tasks:
         if task.project_id not in project_map:
@@ -485,56 +436,308 @@ def get_my_tasks(user=Depends(get_current_user), db: Session = Depends(get_db)):
             "when": task.when,
             "how": task.how
         })
-
     return list(project_map.values())
 
+@app.get("/my-tasks", response_model=List[MyTasksGroup])
+async def get_my_tasks(
+    request: Request,
+    response: Response,
+    user=Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    version = await db.scalar(table_version_stmt())
+    etag = make_etag("my-tasks", user.id, version or 0)
+    not_modified = conditional(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    async def render():
+        tasks = (await db.execute(my_tasks_stmt(user.id))).scalars().all()
+        return {}, render_json(List[MyTasksGroup], group_my_tasks(tasks))
+
+    return cached_response(await view_cache.get_or_render(etag, ALL_PROJECTS, render), response)
+
 @app.patch("/tasks/{task_id}/status")
 def update_task_status(
     task_id: int,
     status: str = Query(...),
     db: Session = Depends(get_db)
 ):
-    print(f"🛠️ PATCH /tasks/{task_id}/status?status={status}")
+    progress = ProgressDeltas()
+    for _ in range(TASK_WRITE_ATTEMPTS):
+        task = (
+            db.query(Task.id, Task.name, Task.project_id, Task.status, Task.user_id)
+            .filter(Task.id == task_id)
+            .first()
+        )
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+        if set_task_statuses(db, [task], {task.id: status}, progress):
+            break
+    else:
+        raise HTTPException(status_code=409, detail=TASK_CHANGED_DETAIL)
 
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
-        print("❌ Task not found.")
-        raise HTTPException(status_code=404, detail="Task not found")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("task status change", extra={
+            "task_id": task.id, "old_status": task.status, "status": status, "assignee": task.user_id,
+        })
 
-    print(f"✅ Found task: {task.name} | Old Status: {task.status} | Assigned to: {task.user_id}")
+    old_status = task.status
+    result = {"id": task.id, "name": task.name, "status": status}
+    project_id = task.project_id
 
-    task.status = status
+    # Side effects (notifications, ...) run from the job queue; the job row commits
+    # atomically with the status change, so neither can happen without the other
+    enqueue(db, "task_status_changed", {"task_ids": [task.id], "old_status": old_status, "status": status})
+    progress.apply(db)
+    bump_project_versions(db, [project_id])
     db.commit()
-    db.refresh(task)
+    job_queue.wake()
+    invalidate_ai_analysis(project_id)
+    view_cache.invalidate([project_id])
 
-    if status == "In Progress":
-        print("🔥 Status is In Progress — creating notification...")
-
-        if task.user_id:
-            notification = Notification(
-                user_id=task.user_id,
-                message=f"Your task '{task.name}' is now in progress.",
-                task_id=task.id
-            )
-            db.add(notification)
-            db.commit()
-            print("✅ Notification created.")
+    return result
+
+@app.patch("/tasks/status")
+def update_task_statuses(data: BulkTaskStatusUpdate, db: Session = Depends(get_db)):
+    # Bulk form of PATCH /tasks/{task_id}/status: one UPDATE per (old, new) status pair and one
+    # queued job per new status, with the same notification rules. Returns one result per
+    # requested task (the schema rejects a task id listed twice; a task both listed and matched
+    # by where is updated once, to its listed status).
+    requested = {u.task_id: u.status for u in data.updates}
+    found = {}
+    if requested:
+        found = {
+            row.id: row
+            for row in db.query(Task.id, Task.project_id, Task.status).filter(Task.id.in_(requested))
+        }
+
+    if data.where is not None:
+        query = db.query(Task.id, Task.project_id, Task.status).filter(Task.project_id == data.where.project_id)
+        if data.where.role is not None:
+            query = query.filter(Task.role == data.where.role)
+        if data.where.current_status is not None:
+            query = query.filter(Task.status == data.where.current_status)
+        for row in query:
+            found[row.id] = row
+            requested.setdefault(row.id, data.where.status)
+
+    progress = ProgressDeltas()
+    changed = set_task_statuses(db, [found[task_id] for task_id in requested if task_id in found], requested, progress)
+    by_status = {}
+    results = []
+    for task_id, status in requested.items():
+        row = found.get(task_id)
+        if row is None:
+            results.append({"task_id": task_id, "ok": False, "detail": "Task not found"})
+        elif task_id not in changed:
+            results.append({"task_id": task_id, "ok": False, "detail": TASK_CHANGED_DETAIL})
         else:
-            print("⚠️ Task has no assigned user, so notification was skipped.")
+            by_status.setdefault(status, []).append(task_id)
+            results.append({"task_id": task_id, "ok": True, "old_status": row.status, "status": status})
+
+    for status, task_ids in by_status.items():
+        enqueue(db, "task_status_changed", {"task_ids": task_ids, "status": status})
+    progress.apply(db)
+    if by_status:
+        bump_project_versions(db, {found[task_id].project_id for ids in by_status.values() for task_id in ids})
+    db.commit()
+    job_queue.wake()
+
+    for project_id in {row.project_id for row in found.values()}:
+        invalidate_ai_analysis(project_id)
+    view_cache.invalidate({row.project_id for row in found.values()})
+    return {"updated": sum(len(ids) for ids in by_status.values()), "results": results}
+
+@job_handler("task_status_changed")
+def on_task_status_changed(db: Session, payload):
+    # Only "In Progress" notifies, and only tasks with an assigned user.
+    # All notifications for the batch come from one INSERT ... SELECT; they are pushed by the
+    # returned callback, once the job queue has committed them.
+    if payload["status"] != "In Progress":
+        logger.debug("no notification for status", extra={"status": payload["status"]})
+        return
+
+    message = literal("Your task '") + Task.name + literal("' is now in progress.")
+    stmt = (
+        insert(Notification)
+        .from_select(
+            ["user_id", "message", "task_id"],
+            select(Task.user_id, message, Task.id).where(
+                Task.id.in_(payload["task_ids"]),
+                Task.user_id.isnot(None),
+                # A later status change may already have moved the task on
+                Task.status == "In Progress",
+            ),
+        )
+        .returning(Notification.id, Notification.user_id, Notification.message, Notification.task_id)
+    )
+    created = db.execute(stmt).all()
+    logger.debug("status notifications created", extra={"count": len(created), "task_ids": payload["task_ids"]})
+
+    def publish():
+        for notif_id, user_id, text, task_id in created:
+            notification_hub.publish(user_id, {"id": notif_id, "message": text, "task_id": task_id})
+    return publish
+
+@app.on_event("startup")
+def start_job_workers():
+    job_queue.start()
+
+@app.on_event("startup")
+def bind_view_cache():
+    # A shared cache file can outlive the database it was filled from (e.g. a re-created dev
+    # database whose version counters start over); it is only emptied for a different database
+    with engine.connect() as conn:
+        view_cache.bind(database_identity(conn))
+
+@app.on_event("shutdown")
+def stop_job_workers():
+    job_queue.stop()
+
+@app.get("/jobs/metrics")
+def job_metrics(db: Session = Depends(get_db)):
+    return job_queue.stats(db)
+
+def notification_payload(n):
+    # Same shape as the rows of GET /notifications
+    return {"id": n.id, "message": n.message, "task_id": n.task_id}
+
+NOTIFICATION_HEARTBEAT_SECONDS = 15
+NOTIFICATION_BACKLOG_LIMIT = 500
+
+@app.get("/notifications/stream")
+async def stream_notifications(
+    request: Request,
+    token: Optional[str] = None,
+    after: Optional[int] = None,
+    authorization: Optional[str] = Header(None),
+    last_event_id: Optional[int] = Header(None),
+):
+    # Server-Sent Events push of new notifications for the current user.
+    # EventSource can't send headers, so the token may also come as ?token=. On reconnect the
+    # browser sends Last-Event-ID and anything newer is replayed from the database first.
+    # The stream can stay open for hours, so the token lookup and the backlog use short-lived
+    # sessions of their own instead of get_db, which would hold a pooled connection throughout.
+    if authorization:
+        token = authorization.split(" ")[1]
+    if not token:
+        raise HTTPException(status_code=401, detail="Missing token")
+    user = await run_in_threadpool(with_session, resolve_user, token)
+    resume_from = last_event_id if last_event_id is not None else after
+
+    def load_backlog(db: Session):
+        if resume_from is None:
+            return []
+        rows = (
+            db.query(Notification.id, Notification.message, Notification.task_id)
+            .filter(Notification.user_id == user.id, Notification.id > resume_from)
+            .order_by(Notification.id)
+            .limit(NOTIFICATION_BACKLOG_LIMIT)
+            .all()
+        )
+        return [dict(row._mapping) for row in rows]
 
-    else:
-        print(f"ℹ️ Status is '{status}', no notification created.")
+    # Subscribe before reading the backlog so nothing committed in between is missed
+    sub = notification_hub.subscribe(user.id)
+    try:
+        backlog = await run_in_threadpool(with_session, load_backlog)
+    except BaseException:
+        notification_hub.unsubscribe(sub)
+        raise
+
+    async def events():
+        last_sent = resume_from or 0
+        try:
+            for payload in backlog:
+                last_sent = payload["id"]
+                yield f"id: {payload['id']}\nevent: notification\ndata: {json.dumps(payload)}\n\n"
+            if len(backlog) == NOTIFICATION_BACKLOG_LIMIT:
+                # More to replay; end here and let the client reconnect from the last id sent
+                return
+
+            while not sub.lagging and not await request.is_disconnected():
+                try:
+                    payload = await asyncio.wait_for(sub.queue.get(), timeout=NOTIFICATION_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                if payload["id"] <= last_sent:
+                    continue
+                last_sent = payload["id"]
+                yield f"id: {payload['id']}\nevent: notification\ndata: {json.dumps(payload)}\n\n"
+        finally:
+            notification_hub.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    return {
-        "id": task.id,
-        "name": task.name,
-        "status": task.status
-    }
+@app.get("/notifications", response_model=List[NotificationRecord], response_model_exclude_unset=True)
+async def get_notifications(
+    response: Response,
+    page: Page = Depends(),
+    since_id: Optional[int] = None,
+    unread: bool = False,
+    fields: Optional[str] = None,
+    user=Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # ?since_id= is the incremental form: only notifications newer than the last one the client has
+    if since_id is not None:
+        page.after = since_id
+    filters = [Notification.user_id == user.id]
+    if unread:
+        filters.append(Notification.read_at.is_(None))
+    field_names = parse_fields(fields, NOTIFICATION_FIELDS, ["id", "message", "task_id"])
+    rows = await fetch_page_async(db, Notification, page, field_names, *filters)
+    page.set_next(response, rows)
+    return rows
+
+@app.get("/notifications/count")
+def count_notifications(user=Depends(get_current_user), db: Session = Depends(get_db)):
+    # Answered from ix_notifications_user_id_read_at without touching the table rows
+    total, unread = db.query(
+        func.count(Notification.id),
+        func.coalesce(func.sum(case((Notification.read_at.is_(None), 1), else_=0)), 0),
+    ).filter(Notification.user_id == user.id).one()
+    return {"total": total, "unread": unread}
+
+def bulk_notification_query(db: Session, user_id: int, action: NotificationBulkAction):
+    query = db.query(Notification).filter(Notification.user_id == user_id)
+    if action.ids is not None:
+        query = query.filter(Notification.id.in_(action.ids))
+    if action.up_to_id is not None:
+        query = query.filter(Notification.id <= action.up_to_id)
+    return query
+
+@app.post("/notifications/mark-read")
+def mark_notifications_read(
+    action: NotificationBulkAction,
+    user=Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    # One UPDATE for the whole selection
+    updated = (
+        bulk_notification_query(db, user.id, action)
+        .filter(Notification.read_at.is_(None))
+        .update({Notification.read_at: datetime.utcnow()}, synchronize_session=False)
+    )
+    db.commit()
+    return {"updated": updated}
 
-@app.get("/notifications")
-def get_notifications(user=Depends(get_current_user), db: Session = Depends(get_db)):
-    notifications = db.query(Notification).filter(Notification.user_id == user.id).all()
-    return [{"id": n.id, "message": n.message, "task_id": n.task_id} for n in notifications]
+@app.post("/notifications/bulk-delete")
+def delete_notifications(
+    action: NotificationBulkAction,
+    user=Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    # One DELETE for the whole selection
+    deleted = bulk_notification_query(db, user.id, action).delete(synchronize_session=False)
+    db.commit()
+    return {"deleted": deleted}
 
 @app.delete("/notifications/{notif_id}")
 def delete_notification(notif_id: int, user=Depends(get_current_user), db: Session = Depends(get_db)):
@@ -545,10 +748,54 @@ def delete_notification(notif_id: int, user=Depends(get_current_user), db: Sessi
     db.commit()
     return {"message": "Notification deleted"}
 
-@app.get("/test-notifs")
-def test_notifications(db: Session = Depends(get_db)):
-    notifs = db.query(Notification).all()
-    return [{"id": n.id, "user_id": n.user_id, "message": n.message} for n in notifs]
+@app.get("/test-notifs", response_model=List[NotificationRecord], response_model_exclude_unset=True)
+def test_notifications(
+    response: Response,
+    page: Page = Depends(),
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    field_names = parse_fields(fields, NOTIFICATION_FIELDS, ["id", "user_id", "message"])
+    rows = fetch_page(db, Notification, page, field_names)
+    page.set_next(response, rows)
+    return rows
+
+# Above this many recipients the drawing-version fan-out is queued as a "project_notification"
+# job instead of running inside the request. 0 (default) always inserts inline, which skips the
+# extra recipient count query.
+DRAWING_NOTIFY_DEFER_THRESHOLD = int(os.getenv("DRAWING_NOTIFY_DEFER_THRESHOLD", "0"))
+
+def project_recipients(project_id: int):
+    # Everyone assigned to the project through a task or a role, de-duplicated by UNION
+    return union(
+        select(Task.user_id).where(Task.project_id == project_id, Task.user_id.isnot(None)),
+        select(RoleAssignment.user_id).where(RoleAssignment.project_id == project_id, RoleAssignment.user_id.isnot(None)),
+    ).subquery()
+
+def fan_out_project_notification(db: Session, project_id: int, message: str):
+    # One INSERT ... SELECT over the recipient UNION; returns (user_id, payload) for the push channel
+    recipients = project_recipients(project_id)
+    stmt = (
+        insert(Notification)
+        .from_select(
+            ["user_id", "message", "task_id"],
+            select(recipients.c.user_id, literal(message), null()),
+        )
+        .returning(Notification.id, Notification.user_id)
+    )
+    return [
+        (user_id, {"id": notif_id, "message": message, "task_id": None})
+        for notif_id, user_id in db.execute(stmt).all()
+    ]
+
+@job_handler("project_notification")
+def on_project_notification(db: Session, payload):
+    payloads = fan_out_project_notification(db, payload["project_id"], payload["message"])
+
+    def publish():
+        for uid, notification in payloads:
+            notification_hub.publish(uid, notification)
+    return publish
 
 @app.patch("/projects/{project_id}/drawing-version")
 def update_drawing_version(
@@ -560,27 +807,28 @@ def update_drawing_version(
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
+    message = f"Drawing version updated to '{version}' for project '{project.name}'"
     project.drawing_version = version
-    db.commit()
 
-    # Notify all users assigned to this project via tasks or roles
-    user_ids = set()
-
-    for task in project.tasks:
-        if task.user_id:
-            user_ids.add(task.user_id)
-
-    for role in project.roles:
-        if role.user_id:
-            user_ids.add(role.user_id)
-
-    for uid in user_ids:
-        notif = Notification(
-            user_id=uid,
-            message=f"Drawing version updated to '{version}' for project '{project.name}'",
-            task_id=None
-        )
-        db.add(notif)
+    defer = False
+    if DRAWING_NOTIFY_DEFER_THRESHOLD > 0:
+        recipient_count = db.execute(select(func.count()).select_from(project_recipients(project_id))).scalar()
+        defer = recipient_count > DRAWING_NOTIFY_DEFER_THRESHOLD
 
+    # The version change commits together with its notifications, or with the job that
+    # creates them, so neither can be lost without the other
+    payloads = []
+    if defer:
+        enqueue(db, "project_notification", {"project_id": project_id, "message": message})
+    else:
+        payloads = fan_out_project_notification(db, project_id, message)
+    bump_project_versions(db, [project_id])
     db.commit()
+    if defer:
+        job_queue.wake()
+    invalidate_ai_analysis(project_id)
+    view_cache.invalidate([project_id])
+
+    for uid, payload in payloads:
+        notification_hub.publish(uid, payload)
     return {"message": "Drawing version updated and notifications sent."}
@@ -0,0 +1,178 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers
+from profiler import PROFILE_ID_HEADER, profiler_for
+
+# Request metrics in Prometheus text format (rendered by metrics_router.py).
+# MetricsMiddleware records per-route latency histograms, request counts by status and the number
+# of in-flight requests. Engine events attribute every SQL statement, with its duration, to the
+# request that issued it via a context variable. The variable is copied into the threadpool, so
+# sync routes are covered too. Statements issued outside a request (job workers) are only counted
+# in the process-wide totals.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+class RequestStats:
+    __slots__ = ("sql_queries", "sql_seconds", "threads")
+
+    def __init__(self, threads=None):
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+        # Only tracked while the request is profiled: idents of the threads that ran its SQL
+        self.threads = threads
+
+_request_stats = ContextVar("request_stats", default=None)
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.requests = {}  # (method, route, status) -> count
+        self.latency = {}  # (method, route) -> Histogram of seconds
+        self.sql_per_request = {}  # (method, route) -> Histogram of statement counts
+        self.sql_seconds = {}  # (method, route) -> total seconds
+        self.sql_total = 0
+        self.sql_total_seconds = 0.0
+
+    def request_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self, method, route, status, seconds, stats):
+        key = (method, route)
+        with self._lock:
+            self.in_flight -= 1
+            self.requests[key + (status,)] = self.requests.get(key + (status,), 0) + 1
+            self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.sql_per_request.setdefault(key, Histogram(SQL_QUERY_BUCKETS)).observe(stats.sql_queries)
+            self.sql_seconds[key] = self.sql_seconds.get(key, 0.0) + stats.sql_seconds
+
+    def sql_executed(self, seconds):
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.sql_queries += 1
+            stats.sql_seconds += seconds
+            if stats.threads is not None:
+                stats.threads.add(threading.get_ident())
+        with self._lock:
+            self.sql_total += 1
+            self.sql_total_seconds += seconds
+
+    def render(self):
+        with self._lock:
+            lines = [
+                "# HELP http_requests_in_flight Requests currently being handled",
+                "# TYPE http_requests_in_flight gauge",
+                f"http_requests_in_flight {self.in_flight}",
+                "# HELP http_requests_total Requests handled, by route and status",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route, status), n in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{{_labels(method, route)},status="{status}"}} {n}')
+            lines += [
+                "# HELP http_request_duration_seconds Request latency, by route",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (method, route), hist in sorted(self.latency.items()):
+                lines.extend(hist.samples("http_request_duration_seconds", _labels(method, route)))
+            lines += [
+                "# HELP http_request_sql_queries SQL statements issued per request, by route",
+                "# TYPE http_request_sql_queries histogram",
+            ]
+            for (method, route), hist in sorted(self.sql_per_request.items()):
+                lines.extend(hist.samples("http_request_sql_queries", _labels(method, route)))
+            lines += [
+                "# HELP http_request_sql_seconds_total Time spent in SQL, by route",
+                "# TYPE http_request_sql_seconds_total counter",
+            ]
+            for (method, route), seconds in sorted(self.sql_seconds.items()):
+                lines.append(f"http_request_sql_seconds_total{{{_labels(method, route)}}} {seconds}")
+            lines += [
+                "# HELP db_queries_total SQL statements issued by the process",
+                "# TYPE db_queries_total counter",
+                f"db_queries_total {self.sql_total}",
+                "# HELP db_query_seconds_total Time spent in SQL by the process",
+                "# TYPE db_query_seconds_total counter",
+                f"db_query_seconds_total {self.sql_total_seconds}",
+            ]
+        return lines
+
+def _labels(method, route):
+    return f'method="{method}",route="{route}"'
+
+metrics = Metrics()
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _sql_started(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _sql_finished(conn, cursor, statement, parameters, context, executemany):
+    metrics.sql_executed(time.perf_counter() - conn.info["metrics_query_start"].pop())
+
+class MetricsMiddleware:
+    def __init__(self, app, registry=metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profiler = profiler_for(Headers(scope=scope))
+        stats = RequestStats({threading.get_ident()} if profiler is not None else None)
+        token = _request_stats.set(stats)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status, profiler
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if profiler is not None:
+                    profile_id = profiler.stop(stats.threads)
+                    profiler = None
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (PROFILE_ID_HEADER.lower().encode(), profile_id.encode())
+                    ]
+            await send(message)
+
+        self.registry.request_started()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            if profiler is not None:
+                profiler.stop(stats.threads)
+            # Label by route template, not raw path, so ids don't explode the series count
+            route = scope.get("route")
+            self.registry.request_finished(
+                scope["method"], getattr(route, "path", "unmatched"), status, time.perf_counter() - start, stats
+            )
+            _request_stats.reset(token)
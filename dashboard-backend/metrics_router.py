@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+from database import get_db
+from metrics import metrics
+from profiler import profiles
+from auth import user_cache
+from ai_router import analysis_cache
+from jobs import job_queue
+from view_cache import view_cache
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+CACHES = {"user": user_cache, "ai_analysis": analysis_cache, "views": view_cache}
+
+def cache_lines():
+    stats = {label: cache.stats() for label, cache in CACHES.items()}
+    stats = {label: values for label, values in stats.items() if values}  # VIEW_CACHE_BACKEND=off
+    lines = []
+    for stat, kind in [("size", "gauge"), ("hits", "counter"), ("misses", "counter"), ("evictions", "counter")]:
+        name = f"cache_{stat}" if kind == "gauge" else f"cache_{stat}_total"
+        lines += [f"# HELP {name} In-process cache {stat}", f"# TYPE {name} {kind}"]
+        lines += [f'{name}{{cache="{label}"}} {values[stat]}' for label, values in stats.items()]
+    return lines
+
+def job_lines(db: Session):
+    stats = job_queue.stats(db)
+    lines = ["# HELP job_queue_jobs Jobs in the queue table, by status", "# TYPE job_queue_jobs gauge"]
+    lines += [f'job_queue_jobs{{status="{status}"}} {stats[status]}' for status in ("pending", "running", "dead")]
+    for stat in ("completed", "retried", "dead_lettered"):
+        lines += [f"# TYPE job_queue_{stat}_total counter", f"job_queue_{stat}_total {stats[stat]}"]
+    for stat in ("oldest_pending_age_seconds", "latency_avg_seconds", "latency_max_seconds", "workers"):
+        lines += [f"# TYPE job_queue_{stat} gauge", f"job_queue_{stat} {stats[stat]}"]
+    return lines
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics(db: Session = Depends(get_db)):
+    lines = metrics.render() + cache_lines() + job_lines(db)
+    return PlainTextResponse("\n".join(lines) + "\n", media_type=PROMETHEUS_CONTENT_TYPE)
+
+@router.get("/metrics/profiles/{profile_id}", response_class=PlainTextResponse)
+def request_profile(profile_id: str):
+    profile = profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found or expired")
+    return PlainTextResponse(profile + "\n")
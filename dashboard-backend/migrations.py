@@ -0,0 +1,131 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from database import engine
+from etags import seed_version_rows
+from search_router import create_search_index
+from progress import PROGRESS_FIELDS, repair_progress
+import models
+
+# Versioned schema migrations.
+# Base.metadata.create_all() only creates missing tables and never alters existing ones,
+# so every change to a table that may already hold data gets a new entry in MIGRATIONS.
+# Migrations must be safe to run on a database that create_all() just built (check first).
+#
+# Usage: python migrations.py            (upgrade to latest)
+#        python migrations.py --status   (show applied versions)
+
+_meta = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _meta,
+    Column("version", Integer, primary_key=True),
+    Column("description", String),
+    Column("applied_at", DateTime),
+)
+
+def _create_indexes(*names):
+    def run(conn):
+        for table in models.Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name in names:
+                    index.create(bind=conn, checkfirst=True)
+    return run
+
+def _add_column(table_name, column_name):
+    # Adds a column declared in models.py to an existing table, using the model's type
+    def run(conn):
+        existing = {col["name"] for col in inspect(conn).get_columns(table_name)}
+        if column_name in existing:
+            return
+        column = models.Base.metadata.tables[table_name].c[column_name]
+        col_type = column.type.compile(dialect=conn.dialect)
+        conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN "{column_name}" {col_type}'))
+    return run
+
+def _create_table(table_name):
+    def run(conn):
+        models.Base.metadata.tables[table_name].create(bind=conn, checkfirst=True)
+    return run
+
+def _backfill_project_versions(conn):
+    conn.execute(text("UPDATE projects SET version = 1 WHERE version IS NULL"))
+
+def _backfill_project_progress(conn):
+    after_id = 0
+    while after_id is not None:
+        after_id, _ = repair_progress(conn, after_id)
+
+def _steps(*steps):
+    def run(conn):
+        for step in steps:
+            step(conn)
+    return run
+
+FK_INDEXES = [
+    "ix_tasks_project_id",
+    "ix_tasks_user_id_status",
+    "ix_notifications_user_id_id",
+    "ix_notifications_task_id",
+    "ix_role_assignments_project_id",
+    "ix_role_assignments_user_id",
+]
+
+MIGRATIONS = [
+    (1, "Foreign-key and composite indexes on tasks, notifications and role_assignments",
+     _create_indexes(*FK_INDEXES)),
+    (2, "Full-text project search index (SQLite FTS5) and sync triggers",
+     create_search_index),
+    (3, "Notification read state (notifications.read_at) and unread-count index",
+     _steps(_add_column("notifications", "read_at"), _create_indexes("ix_notifications_user_id_read_at"))),
+    (4, "Persistent background job queue (jobs)",
+     _create_table("jobs")),
+    (5, "Per-project version counter (projects.version) and table-level data_versions for ETags",
+     _steps(
+         _add_column("projects", "version"), _backfill_project_versions,
+         _create_table("data_versions"), seed_version_rows,
+     )),
+    (6, "Denormalized per-project task counters (projects.tasks_total, tasks_pending, ...)",
+     _steps(*[_add_column("projects", name) for name in PROGRESS_FIELDS], _backfill_project_progress)),
+    (7, "Sharded data_versions counters for projects, created up front instead of on first write",
+     seed_version_rows),
+]
+
+def applied_versions(conn):
+    schema_migrations.create(bind=conn, checkfirst=True)
+    return {row.version for row in conn.execute(select(schema_migrations.c.version))}
+
+def database_identity(conn):
+    # Tells a database apart from an earlier one at the same URL: when its first migration ran
+    if not inspect(conn).has_table("schema_migrations"):
+        return None
+    return conn.execute(
+        select(schema_migrations.c.applied_at).order_by(schema_migrations.c.version).limit(1)
+    ).scalar()
+
+def upgrade(bind=engine, target=None):
+    # Applies every pending migration up to target (default: latest) in one transaction
+    applied = []
+    with bind.begin() as conn:
+        done = applied_versions(conn)
+        for version, description, run in MIGRATIONS:
+            if version in done or (target is not None and version > target):
+                continue
+            run(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version, description=description, applied_at=datetime.utcnow()
+            ))
+            applied.append(version)
+    return applied
+
+if __name__ == "__main__":
+    import sys
+
+    if "--status" in sys.argv:
+        with engine.begin() as conn:
+            done = applied_versions(conn)
+        for version, description, _ in MIGRATIONS:
+            print(f"{'x' if version in done else ' '} {version:>3}  {description}")
+    else:
+        models.Base.metadata.create_all(bind=engine)
+        print(f"Applied migrations: {upgrade() or 'none'}")
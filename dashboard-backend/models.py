@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Date, DateTime, Index
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -22,6 +22,14 @@ class Project(Base):
     client_phone = Column(String, nullable=True)
     drawing_number = Column(String, nullable=True)
     drawing_version = Column(String, nullable=True)
+    # Bumped with every change to the project, its tasks or its role assignments (see etags.py)
+    version = Column(Integer, nullable=False, default=1)
+    # Task counters maintained by every task write (see progress.py)
+    tasks_total = Column(Integer, nullable=False, default=0)
+    tasks_pending = Column(Integer, nullable=False, default=0)
+    tasks_in_progress = Column(Integer, nullable=False, default=0)
+    tasks_completed = Column(Integer, nullable=False, default=0)
+    tasks_blocked = Column(Integer, nullable=False, default=0)
 
     tasks = relationship("Task", back_populates="project", cascade="all, delete-orphan")
     roles = relationship("RoleAssignment", back_populates="project", cascade="all, delete-orphan")
@@ -29,9 +37,9 @@ class Project(Base):
 class RoleAssignment(Base):
     __tablename__ = "role_assignments"
     id = Column(Integer, primary_key=True, index=True)
-    project_id = Column(Integer, ForeignKey("projects.id"))
+    project_id = Column(Integer, ForeignKey("projects.id"), index=True)
     role = Column(String)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
 
     project = relationship("Project", back_populates="roles")
     user = relationship("User", back_populates="role_assignments")
@@ -42,7 +50,7 @@ class Task(Base):
     name = Column(String, nullable=False)
     status = Column(String, default="Pending")
     role = Column(String)
-    project_id = Column(Integer, ForeignKey("projects.id"))
+    project_id = Column(Integer, ForeignKey("projects.id"), index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
 
     who = Column(String, nullable=True)
@@ -53,12 +61,47 @@ class Task(Base):
     project = relationship("Project", back_populates="tasks")
     user = relationship("User", back_populates="tasks")
 
+    # Leading user_id column also serves plain user_id lookups (/my-tasks)
+    __table_args__ = (Index("ix_tasks_user_id_status", "user_id", "status"),)
+
 class Notification(Base):
     __tablename__ = "notifications"
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     message = Column(String)
-    task_id = Column(Integer, ForeignKey("tasks.id"))
-    
+    task_id = Column(Integer, ForeignKey("tasks.id"), index=True)
+    read_at = Column(DateTime, nullable=True)
+
     user = relationship("User")
     task = relationship("Task")
+
+    __table_args__ = (
+        # Matches the per-user, id-ordered keyset scan of GET /notifications
+        Index("ix_notifications_user_id_id", "user_id", "id"),
+        # Lets /notifications/count answer unread counts from the index alone
+        Index("ix_notifications_user_id_read_at", "user_id", "read_at"),
+    )
+
+class Job(Base):
+    # Persistent background job (see jobs.py); rows are written in the same transaction as the
+    # change that caused them, and removed once handled. status: pending | running | dead
+    __tablename__ = "jobs"
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    payload = Column(Text, nullable=False, default="{}")
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (Index("ix_jobs_status_run_at", "status", "run_at"),)
+
+class DataVersion(Base):
+    # Table-level change counters, e.g. the "projects" rows, one of which is bumped by every
+    # project/task write, so list endpoints can answer conditional GETs cheaply (see etags.py)
+    __tablename__ = "data_versions"
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
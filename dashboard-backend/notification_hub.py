@@ -0,0 +1,62 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+# In-process fan-out of new notifications to connected SSE clients.
+# Handlers publish from threadpool threads; each subscriber owns an asyncio.Queue on the event
+# loop, so delivery goes through loop.call_soon_threadsafe. With several workers a client only
+# hears about writes made by its own worker live; everything else is picked up from the
+# database when it reconnects with Last-Event-ID.
+
+SUBSCRIBER_QUEUE_SIZE = 256
+
+class Subscription:
+    def __init__(self, user_id, loop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        # Set when the queue overflowed; the stream then ends and the client resumes from the DB
+        self.lagging = False
+
+    def offer(self, payload):
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.lagging = True
+
+class NotificationHub:
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        # Must be called from the event loop that will consume the subscription
+        sub = Subscription(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[user_id].add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.user_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.user_id]
+
+    def publish(self, user_id, payload):
+        # Safe to call from any thread, after the notification row is committed
+        with self._lock:
+            subs = list(self._subscribers.get(user_id, ()))
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, payload)
+            except RuntimeError:
+                # Loop already closed; the stream's cleanup will unsubscribe it
+                pass
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(subs) for subs in self._subscribers.values())
+
+hub = NotificationHub()
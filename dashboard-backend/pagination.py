@@ -0,0 +1,55 @@
+from typing import Optional
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import select
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Clients follow this header until it is absent to walk a full listing
+NEXT_CURSOR_HEADER = "X-Next-After"
+
+class Page:
+    # FastAPI dependency for keyset pagination on the id column (?after=&limit=).
+    # limit is clamped to MAX_PAGE_SIZE so no request can pull a whole table.
+    def __init__(
+        self,
+        after: Optional[int] = Query(None, ge=0),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+    ):
+        self.after = after
+        self.limit = min(limit, MAX_PAGE_SIZE)
+
+    def apply(self, query, id_column):
+        if self.after is not None:
+            query = query.filter(id_column > self.after)
+        return query.order_by(id_column).limit(self.limit)
+
+    def set_next(self, response: Response, rows):
+        if len(rows) == self.limit:
+            response.headers[NEXT_CURSOR_HEADER] = str(rows[-1]["id"])
+
+def parse_fields(fields: Optional[str], allowed, default):
+    # Turns ?fields=a,b into a list of column names; id is always kept because it is the cursor
+    if not fields:
+        return list(default)
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    if "id" not in requested:
+        requested.insert(0, "id")
+    return requested
+
+def page_statement(model, page: Page, field_names, *filters):
+    # Selects only the requested columns, so unused text columns are never loaded or hydrated
+    stmt = select(*[getattr(model, name) for name in field_names])
+    if filters:
+        stmt = stmt.where(*filters)
+    return page.apply(stmt, model.id)
+
+def fetch_page(db, model, page: Page, field_names, *filters):
+    return [dict(row) for row in db.execute(page_statement(model, page, field_names, *filters)).mappings()]
+
+async def fetch_page_async(db, model, page: Page, field_names, *filters):
+    result = await db.execute(page_statement(model, page, field_names, *filters))
+    return [dict(row) for row in result.mappings()]
@@ -0,0 +1,81 @@
+import os
+import sys
+import threading
+import uuid
+from collections import Counter
+from cache import TTLCache
+
+# Opt-in sampling profiler for single requests.
+# With PROFILING_ENABLED=1, a request carrying "X-Profile: 1" is sampled every PROFILE_INTERVAL_MS
+# until its response starts. The stacks are kept in folded format (flamegraph.pl / speedscope),
+# retrievable at /metrics/profiles/{id}, where id comes from the X-Profile-Id response header.
+# Every thread is sampled, but only the request's threads are kept: the event loop thread plus any
+# thread that ran SQL for the request (sync routes run on the threadpool; see metrics.py).
+# Concurrent requests on the loop thread still show up, so profile on a quiet instance.
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "2")) / 1000
+
+profiles = TTLCache(maxsize=int(os.getenv("PROFILE_KEEP", "20")), ttl=float(os.getenv("PROFILE_TTL", "900")))
+
+# (module, function) of the innermost Python frame of a thread that is parked rather than
+# working. Matched with the module so that e.g. a dict or HTTP client get() is still sampled.
+# Blocking C calls (lock acquire, SimpleQueue.get, epoll) have no frame of their own, so these
+# are the stdlib frames that make them.
+_IDLE_FRAMES = {
+    ("threading", "wait"),  # Condition/Event waits, incl. queue.Queue.get and the job workers
+    ("threading", "_wait_for_tstate_lock"),  # join()
+    ("selectors", "select"),  # event loop waiting for I/O
+    ("socket", "accept"),
+    ("concurrent.futures.thread", "_worker"),  # idle executor thread in SimpleQueue.get
+}
+
+def is_idle(frame):
+    return (frame.f_globals.get("__name__"), frame.f_code.co_name) in _IDLE_FRAMES
+
+class SamplingProfiler:
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples = Counter()  # (thread ident, folded stack) -> count
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample_count += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == own or is_idle(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.samples[ident, ";".join(reversed(stack))] += 1
+
+    def stop(self, threads):
+        # Stops sampling and stores the folded stacks of the given threads; returns the profile id
+        self._stop.set()
+        self._thread.join()
+        folded = Counter()
+        for (ident, stack), n in self.samples.items():
+            if ident in threads:
+                folded[stack] += n
+        profile_id = uuid.uuid4().hex[:12]
+        header = f"# {self.sample_count} samples every {self.interval * 1000:g} ms\n"
+        profiles.set(profile_id, header + "\n".join(f"{stack} {n}" for stack, n in folded.most_common()))
+        return profile_id
+
+def profiler_for(headers):
+    # Returns a started profiler if profiling is enabled and the request asked for it, else None
+    if not PROFILING_ENABLED or headers.get(PROFILE_HEADER) not in ("1", "true"):
+        return None
+    return SamplingProfiler().start()
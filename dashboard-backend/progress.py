@@ -0,0 +1,172 @@
+import logging
+import os
+from sqlalchemy import bindparam, case, func, select, update
+from sqlalchemy.orm import Session
+from jobs import enqueue, job_handler
+from models import Project, Task
+
+# Denormalized task counters on projects (tasks_total, tasks_pending, ...), so progress bars can
+# be served from the projects table alone instead of joining and counting tasks.
+#
+# Every write that inserts tasks, deletes them or changes their status records the change in a
+# ProgressDeltas and calls apply() before its commit, so the counters move in the same
+# transaction as the rows they describe. Statuses without a column of their own (e.g. "Waiting
+# for Approval") only count towards tasks_total.
+#
+# repair_progress() recomputes the counters from tasks in batches of project ids, for data
+# written outside the API (bulk SQL, restores) or to check for drift. It runs either as the
+# "repair_project_progress" job, which re-enqueues itself batch by batch, or synchronously:
+#
+# Usage: python progress.py [--batch 500]     (repair now, on this process)
+#        python progress.py --enqueue         (queue the repair for the job workers)
+
+REPAIR_BATCH_SIZE = int(os.getenv("PROGRESS_REPAIR_BATCH_SIZE", "500"))
+
+STATUS_COLUMNS = {
+    "Pending": "tasks_pending",
+    "In Progress": "tasks_in_progress",
+    "Completed": "tasks_completed",
+    "Blocked": "tasks_blocked",
+}
+PROGRESS_FIELDS = ["tasks_total", *STATUS_COLUMNS.values()]
+
+logger = logging.getLogger("ambience.progress")
+
+def count_progress(statuses):
+    # Counter values for a project whose tasks have these statuses
+    counts = dict.fromkeys(PROGRESS_FIELDS, 0)
+    for status in statuses:
+        counts["tasks_total"] += 1
+        if status in STATUS_COLUMNS:
+            counts[STATUS_COLUMNS[status]] += 1
+    return counts
+
+class ProgressDeltas:
+    def __init__(self):
+        self._deltas = {}
+
+    def _shift(self, project_id, status, step):
+        if project_id is None:
+            return
+        delta = self._deltas.setdefault(project_id, dict.fromkeys(PROGRESS_FIELDS, 0))
+        if status in STATUS_COLUMNS:
+            delta[STATUS_COLUMNS[status]] += step
+
+    def added(self, project_id, status="Pending"):
+        self._shift(project_id, status, 1)
+        if project_id is not None:
+            self._deltas[project_id]["tasks_total"] += 1
+
+    def added_rows(self, rows):
+        # Task rows as passed to insert(Task)
+        for row in rows:
+            self.added(row["project_id"], row.get("status", "Pending"))
+
+    def removed(self, project_id, status):
+        self._shift(project_id, status, -1)
+        if project_id is not None:
+            self._deltas[project_id]["tasks_total"] -= 1
+
+    def moved(self, project_id, old_status, status):
+        if old_status != status:
+            self._shift(project_id, old_status, -1)
+            self._shift(project_id, status, 1)
+
+    def apply(self, db):
+        # One executemany UPDATE (col = col + delta) for every project with a non-zero change
+        params = [
+            {"pid": project_id, **{f"d_{name}": delta[name] for name in PROGRESS_FIELDS}}
+            for project_id, delta in sorted(self._deltas.items())
+            if any(delta.values())
+        ]
+        self._deltas.clear()
+        if not params:
+            return
+        projects = Project.__table__
+        stmt = (
+            update(projects)
+            .where(projects.c.id == bindparam("pid"))
+            .values({name: projects.c[name] + bindparam(f"d_{name}") for name in PROGRESS_FIELDS})
+        )
+        db.execute(stmt, params)
+
+def _counts_stmt(first_id, last_id):
+    columns = [func.count(Task.id).label("tasks_total")]
+    columns += [
+        func.sum(case((Task.status == status, 1), else_=0)).label(name)
+        for status, name in STATUS_COLUMNS.items()
+    ]
+    return (
+        select(Task.project_id, *columns)
+        .where(Task.project_id.between(first_id, last_id))
+        .group_by(Task.project_id)
+    )
+
+def repair_progress(db: Session, after_id=0, batch_size=REPAIR_BATCH_SIZE):
+    # Recomputes the counters of the next batch of projects (id > after_id) and writes the ones
+    # that drifted. Returns (last project id in the batch or None when done, projects fixed).
+    projects = db.execute(
+        select(Project.id, *[getattr(Project, name) for name in PROGRESS_FIELDS])
+        .where(Project.id > after_id)
+        .order_by(Project.id)
+        .limit(batch_size)
+    ).all()
+    if not projects:
+        return None, 0
+
+    actual = {row.project_id: row for row in db.execute(_counts_stmt(projects[0].id, projects[-1].id))}
+    fixes = []
+    for project in projects:
+        row = actual.get(project.id)
+        counts = {name: (getattr(row, name) or 0) if row is not None else 0 for name in PROGRESS_FIELDS}
+        if any(getattr(project, name) != counts[name] for name in PROGRESS_FIELDS):
+            fixes.append({"pid": project.id, **{f"v_{name}": counts[name] for name in PROGRESS_FIELDS}})
+
+    if fixes:
+        table = Project.__table__
+        db.execute(
+            update(table)
+            .where(table.c.id == bindparam("pid"))
+            .values({name: bindparam(f"v_{name}") for name in PROGRESS_FIELDS}),
+            fixes,
+        )
+    return projects[-1].id, len(fixes)
+
+def repair_all(db: Session, batch_size=REPAIR_BATCH_SIZE):
+    # Synchronous full pass, one commit per batch so no transaction holds the write lock for long
+    after_id, fixed = 0, 0
+    while True:
+        after_id, batch_fixed = repair_progress(db, after_id, batch_size)
+        db.commit()
+        if after_id is None:
+            return fixed
+        fixed += batch_fixed
+
+@job_handler("repair_project_progress")
+def on_repair_project_progress(db: Session, payload):
+    # One batch per job run; the next batch is enqueued in the same transaction as this one's fixes
+    after_id, fixed = repair_progress(db, payload.get("after_id", 0), payload.get("batch_size", REPAIR_BATCH_SIZE))
+    if fixed:
+        logger.warning("project progress counters repaired", extra={"count": fixed, "last_project_id": after_id})
+    if after_id is not None:
+        enqueue(db, "repair_project_progress", {**payload, "after_id": after_id})
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Recompute per-project task counters from tasks")
+    parser.add_argument("--batch", type=int, default=REPAIR_BATCH_SIZE)
+    parser.add_argument("--enqueue", action="store_true", help="queue a repair_project_progress job instead")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.enqueue:
+            enqueue(db, "repair_project_progress", {"batch_size": args.batch})
+            db.commit()
+            print("Queued repair_project_progress")
+        else:
+            print(f"Repaired progress counters on {repair_all(db, args.batch)} projects")
+    finally:
+        db.close()
@@ -0,0 +1,57 @@
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from models import Project, RoleAssignment, Task
+from progress import ProgressDeltas
+from search_router import index_projects, unindex_projects
+from task_templates import get_template, build_task_rows
+
+# Batched creation of fully specified projects (ProjectCreateFull), shared by the create
+# endpoints in main.py and the bulk import in import_router.py.
+
+FULL_CREATE_TEMPLATE = "full-create"
+
+def insert_returning_ids(db: Session, model, rows):
+    # Batched INSERT ... RETURNING id, with ids in the same order as rows.
+    # SQLAlchemy can only guarantee RETURNING order on SQLite by inserting row by row, but SQLite
+    # assigns integer primary keys as max(id) + 1 in VALUES order, so sorting the batch is equivalent.
+    if db.get_bind().dialect.name == "sqlite":
+        return sorted(db.execute(insert(model).returning(model.id), rows).scalars().all())
+    stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+    return db.execute(stmt, rows).scalars().all()
+
+def insert_full_projects(db: Session, items):
+    # Projects, their role assignments and templated tasks in three INSERT batches; users must
+    # already be checked and the caller bumps versions and commits. Returns the new project ids.
+    project_ids = insert_returning_ids(
+        db,
+        Project,
+        [
+            {
+                "name": item.name,
+                "client_name": item.clientName,
+                "client_email": item.clientEmail,
+                "client_phone": item.clientPhone,
+                "address": item.address,
+            }
+            for item in items
+        ]
+    )
+
+    template = get_template(FULL_CREATE_TEMPLATE)
+    role_rows, task_rows = [], []
+    for item, project_id in zip(items, project_ids):
+        role_user_map = {role.role: role.userId for role in item.roles}
+        role_rows.extend({"project_id": project_id, "role": role, "user_id": uid} for role, uid in role_user_map.items())
+        task_rows.extend(build_task_rows(template, project_id, role_user_map))
+    # Core table inserts: at thousands of rows the ORM bulk path costs more than the INSERT itself
+    if role_rows:
+        db.execute(insert(RoleAssignment.__table__), role_rows)
+    if task_rows:
+        # Indexes each project's task text once instead of once per task (search triggers)
+        unindex_projects(db, project_ids)
+        db.execute(insert(Task.__table__), task_rows)
+        index_projects(db, project_ids)
+        progress = ProgressDeltas()
+        progress.added_rows(task_rows)
+        progress.apply(db)
+    return project_ids
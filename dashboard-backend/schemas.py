@@ -1,19 +1,82 @@
-from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict
 from typing import List
 from typing import List
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, model_validator
 
 class TaskModel(BaseModel):
     id: int
     name: str
-    status: str
-    role: str
+    status: Optional[str] = None
+    role: Optional[str] = None
 
 class ProjectModel(BaseModel):
     id: int
     name: str
     tasks: List[TaskModel]
 
+class TaskDetail(TaskModel):
+    who: Optional[str] = None
+    what: Optional[str] = None
+    when: Optional[str] = None
+    how: Optional[str] = None
+
+class ProjectDetail(BaseModel):
+    id: int
+    name: str
+    drawing_number: Optional[str] = None
+    drawing_version: Optional[str] = None
+    tasks: List[TaskDetail]
+
+class MyTasksGroup(BaseModel):
+    project_id: int
+    project_name: str
+    tasks: List[TaskDetail]
+
+# Row models for the list endpoints. Every field but id is optional because ?fields= can
+# select a subset; those routes use response_model_exclude_unset so unselected fields are omitted.
+class ProjectRecord(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    name: Optional[str] = None
+    address: Optional[str] = None
+    client_name: Optional[str] = None
+    client_email: Optional[str] = None
+    client_phone: Optional[str] = None
+    drawing_number: Optional[str] = None
+    drawing_version: Optional[str] = None
+    tasks_total: Optional[int] = None
+    tasks_pending: Optional[int] = None
+    tasks_in_progress: Optional[int] = None
+    tasks_completed: Optional[int] = None
+    tasks_blocked: Optional[int] = None
+
+class TaskRecord(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    name: Optional[str] = None
+    status: Optional[str] = None
+    role: Optional[str] = None
+    project_id: Optional[int] = None
+    user_id: Optional[int] = None
+    who: Optional[str] = None
+    what: Optional[str] = None
+    when: Optional[str] = None
+    how: Optional[str] = None
+
+class UserRecord(BaseModel):
+    id: int
+    username: Optional[str] = None
+    role: Optional[str] = None
+
+class NotificationRecord(BaseModel):
+    id: int
+    user_id: Optional[int] = None
+    message: Optional[str] = None
+    task_id: Optional[int] = None
+    read_at: Optional[datetime] = None
+
 class AIRequest(BaseModel):
     query: str  # ✅ The user input (natural language)
 
@@ -32,7 +95,7 @@ class ProjectCreateFull(BaseModel):
     roles: List[RoleAssignment]
 
 from pydantic import BaseModel, EmailStr
-from typing import List
+from typing import List, Optional
 
 class RoleAssignment(BaseModel):
     role: str  # still needed to map predefined role ➝ userId
@@ -45,3 +108,44 @@ class ProjectCreateFull(BaseModel):
     clientPhone: str
     address: str
     roles: List[RoleAssignment]
+
+class NotificationBulkAction(BaseModel):
+    # Targets the given ids and/or every notification up to up_to_id, or all of them with
+    # {"all": true}; a body selecting nothing is rejected rather than read as "all"
+    ids: Optional[List[int]] = None
+    up_to_id: Optional[int] = None
+    all: bool = False
+
+    @model_validator(mode="after")
+    def check_selection(self):
+        selective = self.ids is not None or self.up_to_id is not None
+        if self.all and selective:
+            raise ValueError('"all" cannot be combined with ids or up_to_id')
+        if not self.all and not selective:
+            raise ValueError('give ids, up_to_id or "all": true')
+        return self
+
+class TaskStatusUpdate(BaseModel):
+    task_id: int
+    status: str
+
+class TaskStatusFilter(BaseModel):
+    # Every task of the project (optionally only one role / current status) gets `status`
+    project_id: int
+    status: str
+    role: Optional[str] = None
+    current_status: Optional[str] = None
+
+class BulkTaskStatusUpdate(BaseModel):
+    # Each task id at most once in updates; explicit updates win over tasks matched by where
+    updates: List[TaskStatusUpdate] = []
+    where: Optional[TaskStatusFilter] = None
+
+    @model_validator(mode="after")
+    def check_unique_tasks(self):
+        seen, duplicates = set(), set()
+        for update in self.updates:
+            (duplicates if update.task_id in seen else seen).add(update.task_id)
+        if duplicates:
+            raise ValueError(f"task ids listed more than once: {sorted(duplicates)}")
+        return self
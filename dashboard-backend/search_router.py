@@ -0,0 +1,145 @@
+import re
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import bindparam, or_, text
+from sqlalchemy.orm import Session
+from auth import get_current_user
+from database import get_db
+from models import Project
+
+# Ranked project search.
+# On SQLite this is an FTS5 index (project_search) over project name, client name, address and
+# the text of the project's tasks. Triggers on projects/tasks keep it in sync, so every write
+# path, including bulk inserts, is covered. Other backends fall back to ILIKE matching.
+# Results (and matches) include client names and addresses, so the route needs a signed-in user.
+
+router = APIRouter()
+
+MAX_RESULTS = 50
+
+
+_TASK_TEXT = """
+    (SELECT coalesce(group_concat(t.name || ' ' || coalesce(t.what, ''), ' '), '')
+     FROM tasks t WHERE t.project_id = {pid})
+"""
+
+SEARCH_INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS project_search USING fts5(
+        name, client_name, address, task_text,
+        prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    # Column weights for the built-in rank: a name hit outranks client/address, which outranks task text
+    "INSERT INTO project_search(project_search, rank) VALUES('rank', 'bm25(10.0, 5.0, 2.0, 1.0)')",
+    """
+    CREATE TRIGGER IF NOT EXISTS project_search_ai AFTER INSERT ON projects BEGIN
+        INSERT INTO project_search(rowid, name, client_name, address, task_text)
+        VALUES (new.id, new.name, new.client_name, new.address, '');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS project_search_au AFTER UPDATE OF name, client_name, address ON projects BEGIN
+        UPDATE project_search SET name = new.name, client_name = new.client_name, address = new.address
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS project_search_ad AFTER DELETE ON projects BEGIN
+        DELETE FROM project_search WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS project_search_tasks_ai AFTER INSERT ON tasks BEGIN
+        UPDATE project_search SET task_text = {_TASK_TEXT.format(pid="new.project_id")}
+        WHERE rowid = new.project_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS project_search_tasks_au AFTER UPDATE OF name, what, project_id ON tasks BEGIN
+        UPDATE project_search SET task_text = {_TASK_TEXT.format(pid="old.project_id")}
+        WHERE rowid = old.project_id;
+        UPDATE project_search SET task_text = {_TASK_TEXT.format(pid="new.project_id")}
+        WHERE rowid = new.project_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS project_search_tasks_ad AFTER DELETE ON tasks BEGIN
+        UPDATE project_search SET task_text = {_TASK_TEXT.format(pid="old.project_id")}
+        WHERE rowid = old.project_id;
+    END
+    """,
+]
+
+def uses_fts(bind):
+    return bind.dialect.name == "sqlite"
+
+def create_search_index(conn):
+    # Migration step: builds the index and triggers, then (re)fills it from existing rows
+    if not uses_fts(conn):
+        return
+    for ddl in SEARCH_INDEX_DDL:
+        conn.execute(text(ddl))
+    conn.execute(text("DELETE FROM project_search"))
+    conn.execute(text(f"""
+        INSERT INTO project_search(rowid, name, client_name, address, task_text)
+        SELECT p.id, p.name, p.client_name, p.address, {_TASK_TEXT.format(pid="p.id")}
+        FROM projects p
+    """))
+
+def unindex_projects(db, project_ids):
+    # Bulk inserts of tasks for new projects: with the projects' rows gone from the index, the
+    # per-task triggers match nothing, and index_projects() then fills each row once. Both run
+    # in the caller's transaction.
+    if project_ids and uses_fts(db.get_bind()):
+        db.execute(text("DELETE FROM project_search WHERE rowid IN :ids").bindparams(
+            bindparam("ids", expanding=True)), {"ids": list(project_ids)})
+
+def index_projects(db, project_ids):
+    if project_ids and uses_fts(db.get_bind()):
+        db.execute(text(f"""
+            INSERT INTO project_search(rowid, name, client_name, address, task_text)
+            SELECT p.id, p.name, p.client_name, p.address, {_TASK_TEXT.format(pid="p.id")}
+            FROM projects p WHERE p.id IN :ids
+        """).bindparams(bindparam("ids", expanding=True)), {"ids": list(project_ids)})
+
+def fts_query(q: str):
+    # Every word must match, each as a prefix: "amb tow" -> "amb"* "tow"*
+    terms = re.findall(r"\w+", q)
+    return " ".join(f'"{term}"*' for term in terms)
+
+def search_projects(db: Session, q: str, limit: int = 10):
+    # Returns [(project_id, name, client_name, address)] best match first
+    limit = max(1, min(limit, MAX_RESULTS))
+    if uses_fts(db.get_bind()):
+        match = fts_query(q)
+        if not match:
+            return []
+        rows = db.execute(text("""
+            SELECT p.id, p.name, p.client_name, p.address
+            FROM project_search JOIN projects p ON p.id = project_search.rowid
+            WHERE project_search MATCH :match
+            ORDER BY project_search.rank
+            LIMIT :limit
+        """), {"match": match, "limit": limit})
+        return [tuple(row) for row in rows]
+
+    pattern = f"%{q}%"
+    rows = (
+        db.query(Project.id, Project.name, Project.client_name, Project.address)
+        .filter(or_(Project.name.ilike(pattern), Project.client_name.ilike(pattern), Project.address.ilike(pattern)))
+        .order_by(Project.name)
+        .limit(limit)
+    )
+    return [tuple(row) for row in rows]
+
+@router.get("/search")
+def search(
+    q: str = Query(..., min_length=1),
+    limit: int = 10,
+    user=Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    return [
+        {"id": pid, "name": name, "client_name": client_name, "address": address}
+        for pid, name, client_name, address in search_projects(db, q, limit)
+    ]
@@ -0,0 +1,118 @@
+import argparse
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select
+from database import engine
+from auth import hash_password
+from etags import bump_project_versions
+from progress import count_progress
+from task_templates import get_template, build_task_rows
+import models
+
+# Synthetic data in bulk, for local runs, load tests and benchmarks (benchmarks/routes.py).
+# Creates N users, M projects with every template role assigned and the default task flow
+# (as generate_default_tasks would), and K notifications. Rows get explicit ids after the
+# current maximum and go in with chunked executemany INSERTs in one transaction, so the tool
+# also works on a database that already holds data. The same --seed gives the same data.
+#
+# Usage: python seed.py [--users 50] [--projects 1000] [--notifications 50000] [--seed 1]
+# Every seeded user's password is --password (default "password").
+
+WORDS = ["ambience", "tower", "lake", "residency", "heights", "plaza", "garden", "metro", "royal",
+         "crest", "vista", "park", "central", "harbor", "summit", "grand", "palm", "river"]
+CITIES = ["Pune", "Mumbai", "Delhi", "Chennai", "Nagpur", "Indore", "Surat", "Jaipur"]
+# Rough shape of a live dashboard: most work pending or under way
+STATUS_WEIGHTS = {"Pending": 45, "In Progress": 20, "Waiting for Approval": 10, "Completed": 20, "Blocked": 5}
+CHUNK = 5000
+
+def _next_id(conn, model):
+    return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+def _insert_chunked(conn, model, rows):
+    for start in range(0, len(rows), CHUNK):
+        conn.execute(insert(model), rows[start:start + CHUNK])
+
+def seed(bind=engine, users=50, projects=1000, notifications=50000, seed=1, password="password"):
+    rng = random.Random(seed)
+    template = get_template("default")
+    roles = sorted({task["role"] for task in template})
+    statuses, weights = zip(*STATUS_WEIGHTS.items())
+    password_hash = hash_password(password)  # one bcrypt hash shared by every seeded user
+
+    with bind.begin() as conn:
+        first_user = _next_id(conn, models.User)
+        user_ids = list(range(first_user, first_user + users))
+        _insert_chunked(conn, models.User, [
+            {"id": uid, "username": f"user{uid}", "password_hash": password_hash, "role": rng.choice(roles)}
+            for uid in user_ids
+        ])
+
+        first_project = _next_id(conn, models.Project)
+        project_rows, role_rows, task_rows = [], [], []
+        for pid in range(first_project, first_project + projects):
+            project_rows.append({
+                "id": pid,
+                "name": f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {pid}",
+                "client_name": f"{rng.choice(WORDS).title()} Builders",
+                "client_email": f"client{pid}@example.com",
+                "client_phone": f"98{rng.randint(10000000, 99999999)}",
+                "address": f"{rng.randint(1, 999)} {rng.choice(WORDS).title()} Road, {rng.choice(CITIES)}",
+                "drawing_number": f"DRG-{pid:05d}",
+                "drawing_version": f"R{rng.randint(0, 5)}",
+            })
+            role_user_map = {role: rng.choice(user_ids) for role in roles} if user_ids else None
+            if role_user_map:
+                role_rows.extend({"project_id": pid, "role": role, "user_id": uid} for role, uid in role_user_map.items())
+            rows = build_task_rows(template, pid, role_user_map)
+            for row in rows:
+                row["status"] = rng.choices(statuses, weights)[0]
+            project_rows[-1].update(count_progress(row["status"] for row in rows))
+            task_rows.extend(rows)
+        _insert_chunked(conn, models.Project, project_rows)
+        _insert_chunked(conn, models.RoleAssignment, role_rows)
+
+        first_task = _next_id(conn, models.Task)
+        for offset, row in enumerate(task_rows):
+            row["id"] = first_task + offset
+        _insert_chunked(conn, models.Task, task_rows)
+
+        notification_rows = []
+        if user_ids and task_rows:
+            now = datetime.utcnow()
+            for _ in range(notifications):
+                task = rng.choice(task_rows)
+                notification_rows.append({
+                    "user_id": rng.choice(user_ids),
+                    "message": f"Your task '{task['name']}' is now in progress.",
+                    "task_id": task["id"],
+                    "read_at": now - timedelta(minutes=rng.randint(1, 10000)) if rng.random() < 0.5 else None,
+                })
+        _insert_chunked(conn, models.Notification, notification_rows)
+
+        bump_project_versions(conn)
+
+    return {
+        "users": len(user_ids),
+        "projects": len(project_rows),
+        "role_assignments": len(role_rows),
+        "tasks": len(task_rows),
+        "notifications": len(notification_rows),
+    }
+
+if __name__ == "__main__":
+    import time
+    import migrations
+
+    parser = argparse.ArgumentParser(description="Seed the database with synthetic data")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--projects", type=int, default=1000)
+    parser.add_argument("--notifications", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--password", default="password")
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    migrations.upgrade(engine)
+    start = time.perf_counter()
+    counts = seed(engine, args.users, args.projects, args.notifications, args.seed, args.password)
+    print(", ".join(f"{n} {name}" for name, n in counts.items()) + f" in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,171 @@
+from types import MappingProxyType
+
+# Task templates applied when a project is created.
+# Templates are looked up by (name, version) and built once at import, so request handlers
+# share the same immutable rows instead of rebuilding the task list per call.
+# To change a template, register a new version rather than editing an existing one.
+
+TASK_FIELDS = ("name", "role", "who", "what", "when", "how")
+
+_DEFAULT_TASKS = [
+    {
+        "name": "Receive Order", "role": "Project Coordinator",
+        "who": "Project Coordinator",
+        "what": "Receive client order and confirm it in the system",
+        "when": "At the start of the project",
+        "how": "Via client call/email and enter into dashboard",
+    },
+    {
+        "name": "Get Drawing Approved", "role": "Project Engineer",
+        "who": "Project Engineer",
+        "what": "Submit design for approval by client",
+        "when": "After order confirmation",
+        "how": "Upload CAD files or drawings and notify client",
+    },
+    {
+        "name": "Kick-off Meeting", "role": "Supervisor",
+        "who": "Supervisor",
+        "what": "Conduct initial meeting with stakeholders",
+        "when": "Before execution begins",
+        "how": "Schedule meeting, set agenda, share link/invite",
+    },
+    {
+        "name": "Send Electrical Load", "role": "Project Engineer",
+        "who": "Project Engineer",
+        "what": "Calculate and share estimated electrical load",
+        "when": "Before procurement starts",
+        "how": "Use internal tools and email to vendor/client",
+    },
+    {
+        "name": "Prepare Estimation", "role": "Measurement Engineer",
+        "who": "Measurement Engineer",
+        "what": "Estimate project cost and resource needs",
+        "when": "After load calculation",
+        "how": "Use templates and update the dashboard",
+    },
+    {
+        "name": "Approve Estimation", "role": "Operation Head",
+        "who": "Operation Head",
+        "what": "Review and approve estimation",
+        "when": "Post estimation submission",
+        "how": "Check against budget and approve in dashboard",
+    },
+    {
+        "name": "Raise PO", "role": "Purchase Coordinator",
+        "who": "Purchase Coordinator",
+        "what": "Create and submit Purchase Order",
+        "when": "After estimation approval",
+        "how": "Use company PO tool and send to vendors",
+    },
+    {
+        "name": "Approve PO", "role": "Director",
+        "who": "Director",
+        "what": "Review and approve raised Purchase Order",
+        "when": "After PO is raised",
+        "how": "Check details in PO and sign-off in system",
+    },
+    {
+        "name": "Upload RFQ", "role": "Purchase Coordinator",
+        "who": "Purchase Coordinator",
+        "what": "Upload Request for Quotation to system",
+        "when": "After PO approval",
+        "how": "Gather vendor quotes and upload to dashboard",
+    },
+    {
+        "name": "Vendor Follow-ups", "role": "Purchase Coordinator",
+        "who": "Purchase Coordinator",
+        "what": "Follow up with vendors for quotes/delivery",
+        "when": "After RFQ is sent",
+        "how": "Email and call vendors regularly",
+    },
+    {
+        "name": "Prepare Delivery Challan", "role": "Store Coordinator",
+        "who": "Store Coordinator",
+        "what": "Create delivery documentation",
+        "when": "Before dispatch of goods",
+        "how": "Use delivery challan format and print it",
+    },
+    {
+        "name": "Receive Material", "role": "Store Coordinator",
+        "who": "Store Coordinator",
+        "what": "Physically receive and verify materials",
+        "when": "Upon delivery",
+        "how": "Check items, sign delivery challan, upload to system",
+    },
+    {
+        "name": "Upload Invoice", "role": "Purchase Coordinator",
+        "who": "Purchase Coordinator",
+        "what": "Scan and upload vendor invoice",
+        "when": "After material receipt",
+        "how": "Use scanner and upload PDF to dashboard",
+    },
+    {
+        "name": "Upload Measurement", "role": "Measurement Engineer",
+        "who": "Measurement Engineer",
+        "what": "Measure completed work and upload data",
+        "when": "After job completion",
+        "how": "Use on-site tools and submit via dashboard",
+    },
+    {
+        "name": "Final Approvals", "role": "Operation Head",
+        "who": "Operation Head",
+        "what": "Give final sign-off on all project deliverables",
+        "when": "At project closure",
+        "how": "Cross-check all tasks and click approve",
+    },
+]
+
+# The detailed FCM used by /projects/full-create rewords the first four steps
+_FULL_CREATE_OVERRIDES = {
+    "Receive Order": {
+        "how": "Via client call/email, enter order into dashboard",
+    },
+    "Get Drawing Approved": {
+        "what": "Submit design for approval",
+        "when": "After initial planning",
+        "how": "Share CAD files or blueprints with client",
+    },
+    "Kick-off Meeting": {
+        "what": "Conduct the kick-off meeting with all stakeholders",
+        "when": "After order confirmation",
+        "how": "Schedule meeting, set agenda, send invites",
+    },
+    "Send Electrical Load": {
+        "what": "Send the estimated electrical load to the vendor",
+        "when": "Before material procurement",
+        "how": "Use estimation tools and email the results",
+    },
+}
+
+def _freeze(tasks):
+    return tuple(MappingProxyType({field: task[field] for field in TASK_FIELDS}) for task in tasks)
+
+_REGISTRY = {
+    ("default", 1): _freeze(_DEFAULT_TASKS),
+    ("full-create", 1): _freeze({**t, **_FULL_CREATE_OVERRIDES.get(t["name"], {})} for t in _DEFAULT_TASKS),
+}
+
+LATEST_VERSIONS = {}
+for _name, _version in _REGISTRY:
+    LATEST_VERSIONS[_name] = max(_version, LATEST_VERSIONS.get(_name, 0))
+
+def get_template(name, version=None):
+    key = (name, version or LATEST_VERSIONS.get(name))
+    if key not in _REGISTRY:
+        raise KeyError(f"Unknown task template {name!r} version {version}")
+    return _REGISTRY[key]
+
+def build_task_rows(template, project_id, role_user_map=None):
+    # Plain dicts ready for a single executemany INSERT into tasks.
+    # With a role_user_map only roles present in it get a task (the full-create behaviour).
+    rows = []
+    for task in template:
+        if role_user_map is not None and task["role"] not in role_user_map:
+            continue
+        rows.append({
+            **task,
+            "status": "Pending",
+            "project_id": project_id,
+            "user_id": role_user_map[task["role"]] if role_user_map is not None else None,
+        })
+    return rows
@@ -0,0 +1,64 @@
+import os
+import tempfile
+
+# Configured before any app module is imported: a throwaway SQLite file, no job worker threads
+# (tests drain the queue themselves) and no view cache, so every request reaches the database.
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+os.environ["JOB_WORKERS"] = "0"
+os.environ["VIEW_CACHE_BACKEND"] = "off"
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from contextlib import contextmanager
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+import database
+import migrations
+import models
+
+models.Base.metadata.create_all(bind=database.engine)
+migrations.upgrade(database.engine)
+
+import main  # noqa: E402
+from ai_router import analysis_cache
+from auth import create_access_token, user_cache
+from etags import seed_version_rows
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+@pytest.fixture(autouse=True)
+def clean_db():
+    # Every test starts from empty tables and caches
+    yield
+    with database.engine.begin() as conn:
+        for table in reversed(models.Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+        conn.execute(text("DELETE FROM project_search"))
+        seed_version_rows(conn)
+    user_cache.clear()
+    analysis_cache.clear()
+
+def auth_headers(username, role="Supervisor"):
+    return {"Authorization": f"Bearer {create_access_token({'sub': username, 'role': role})}"}
+
+@contextmanager
+def count_statements():
+    # Collects every SQL statement run on the sync and async engines inside the block
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    database.get_async_sessionmaker()  # creates the async engine on first use
+    engines = [database.engine, database.async_engine.sync_engine]
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", record)
@@ -0,0 +1,47 @@
+import asyncio
+
+# Test doubles for the Gemini client used by ai_router (generate_content_async, plain and streamed).
+
+class FakeModel:
+    # Offline stand-in for the Gemini client; install with ai_router.set_model(FakeModel())
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.streams = []
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        text = f"Fake analysis of {len(prompt)} characters of project data."
+        if stream:
+            self.streams.append(FakeStream(text.split(" "), self.delay))
+            return self.streams[-1]
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return FakeResponse(text)
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeStream:
+    # Yields one word per chunk, spreading the model delay across the chunks
+    def __init__(self, words, delay):
+        self.words = words
+        self.delay = delay
+        self.sent = 0
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.sent >= len(self.words):
+            raise StopAsyncIteration
+        if self.delay:
+            await asyncio.sleep(self.delay / len(self.words))
+        word = self.words[self.sent]
+        self.sent += 1
+        return FakeResponse(word if self.sent == 1 else " " + word)
+
+    async def aclose(self):
+        self.closed = True
@@ -0,0 +1,75 @@
+import pytest
+import ai_router
+from tests.fakes import FakeModel
+
+@pytest.fixture
+def fake_model():
+    model = FakeModel()
+    ai_router.set_model(model)
+    yield model
+    ai_router.set_model(None)
+
+@pytest.fixture
+def project(client):
+    return client.post("/projects/", params={"name": "Lakeview Towers"}).json()
+
+def analyze(client, prompt="What is blocked?"):
+    return client.post("/ai/analyze", json={"projectName": "Lakeview", "prompt": prompt})
+
+def test_cache_hit_skips_the_model(client, fake_model, project):
+    first = analyze(client)
+    second = analyze(client)
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert fake_model.calls == 1
+
+    analyze(client, prompt="Who is late?")
+    assert fake_model.calls == 2
+
+def test_task_change_invalidates_the_analysis(client, fake_model, project):
+    analyze(client)
+    client.post(f"/projects/{project['id']}/tasks/", params={"name": "Site survey"})
+    analyze(client)
+    assert fake_model.calls == 2
+
+    task_id = client.get(f"/projects/{project['id']}/tasks/").json()[0]["id"]
+    client.patch(f"/tasks/{task_id}/status", params={"status": "Completed"})
+    analyze(client)
+    assert fake_model.calls == 3
+
+def test_drawing_change_invalidates_the_analysis(client, fake_model, project):
+    analyze(client)
+    client.patch(f"/projects/{project['id']}/drawing-version", params={"version": "R2"})
+    analyze(client)
+    assert fake_model.calls == 2
+
+def test_slow_model_times_out(client, project, monkeypatch):
+    ai_router.set_model(FakeModel(delay=1.0))
+    monkeypatch.setattr(ai_router, "AI_TIMEOUT", 0.05)
+    try:
+        response = analyze(client)
+    finally:
+        ai_router.set_model(None)
+    assert response.status_code == 504
+    assert ai_router.analysis_cache.stats()["size"] == 0
+
+def stream_events(client):
+    response = client.post("/ai/analyze/stream", json={"projectName": "Lakeview", "prompt": "Summarize"})
+    assert response.status_code == 200
+    return [block.split("\n")[0].removeprefix("event: ") for block in response.text.strip().split("\n\n")]
+
+def test_stream_is_closed_after_the_answer(client, fake_model, project):
+    events = stream_events(client)
+    assert events[-1] == "done" and events.count("chunk") > 1
+    assert fake_model.streams[0].closed
+
+def test_stalled_stream_times_out_between_chunks(client, project, monkeypatch):
+    model = FakeModel(delay=2.0)
+    ai_router.set_model(model)
+    monkeypatch.setattr(ai_router, "AI_TIMEOUT", 0.05)
+    try:
+        events = stream_events(client)
+    finally:
+        ai_router.set_model(None)
+    assert events == ["error"]
+    assert model.streams[0].closed
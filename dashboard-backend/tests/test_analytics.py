@@ -0,0 +1,13 @@
+def test_summary_lists_the_projects_with_most_open_tasks(client):
+    ids = [client.post("/projects/", params={"name": name}).json()["id"] for name in ("A", "B", "C")]
+    for project_id, completed in zip(ids, (5, 0, 10)):
+        tasks = client.get(f"/projects/{project_id}/tasks/").json()[:completed]
+        if tasks:
+            client.patch("/tasks/status", json={"updates": [
+                {"task_id": task["id"], "status": "Completed"} for task in tasks
+            ]})
+
+    summary = client.get("/analytics/summary", params={"limit": 2}).json()
+    assert summary["project_count"] == 3 and summary["task_count"] == 45
+    assert [(p["name"], p["total"], p["completed"]) for p in summary["projects"]] == [("B", 15, 0), ("A", 15, 5)]
+    assert client.get("/analytics/summary", params={"limit": 0}).status_code == 422
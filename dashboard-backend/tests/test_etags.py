@@ -0,0 +1,25 @@
+from sqlalchemy import select
+import database
+from etags import VERSION_ROWS, bump_project_versions
+from models import DataVersion
+
+def test_project_list_etag_changes_with_every_write(client):
+    first = client.post("/projects/", params={"name": "Tower"}).json()
+    second = client.post("/projects/", params={"name": "Annex"}).json()
+    etag = client.get("/projects/").headers["etag"]
+    assert client.get("/projects/", headers={"If-None-Match": etag}).status_code == 304
+
+    seen = {etag}
+    for version, project in enumerate((first, second, first), start=2):
+        client.patch(f"/projects/{project['id']}/drawing-version", params={"version": f"R{version}"})
+        etag = client.get("/projects/").headers["etag"]
+        assert etag not in seen
+        seen.add(etag)
+
+def test_bumps_spread_over_the_counter_rows():
+    with database.SessionLocal() as db:
+        for project_id in range(1, len(VERSION_ROWS) + 1):
+            bump_project_versions(db, [project_id])
+        db.commit()
+        counters = dict(db.execute(select(DataVersion.name, DataVersion.version)).all())
+    assert counters == dict.fromkeys(VERSION_ROWS, 1)
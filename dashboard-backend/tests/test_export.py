@@ -0,0 +1,21 @@
+import database
+from models import User
+from tests.conftest import auth_headers
+
+def add_user(username, role):
+    with database.SessionLocal() as db:
+        db.add(User(username=username, password_hash="x", role=role))
+        db.commit()
+
+def test_export_needs_a_signed_in_user(client):
+    assert client.get("/export/projects").status_code == 401
+
+def test_export_is_limited_to_export_roles(client):
+    add_user("sam", "Supervisor")
+    add_user("dana", "Director")
+    client.post("/projects/", params={"name": "Lakeview Towers"})
+
+    assert client.get("/export/projects", headers=auth_headers("sam")).status_code == 403
+    response = client.get("/export/projects", params={"fields": "id,name"}, headers=auth_headers("dana"))
+    assert response.status_code == 200
+    assert response.text.splitlines()[1].endswith(",Lakeview Towers")
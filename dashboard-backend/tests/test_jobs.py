@@ -0,0 +1,103 @@
+import pytest
+import database
+import main
+from jobs import enqueue, job_handler, job_queue
+from models import Job, Notification, Project, Task, User
+from progress import ProgressDeltas
+
+@pytest.fixture
+def task_id():
+    with database.SessionLocal() as db:
+        user = User(username="maria", password_hash="x", role="Supervisor")
+        project = Project(name="Lakeview Towers", tasks_total=1, tasks_pending=1)
+        db.add_all([user, project])
+        db.flush()
+        task = Task(name="Site survey", status="Pending", project_id=project.id, user_id=user.id)
+        db.add(task)
+        db.commit()
+        return task.id
+
+def committed():
+    # What another connection sees: (notifications, queued jobs)
+    with database.SessionLocal() as db:
+        return db.query(Notification).count(), db.query(Job).count()
+
+def test_notifications_are_published_after_they_commit_with_the_job(client, task_id, monkeypatch):
+    seen = []
+    monkeypatch.setattr(main.notification_hub, "publish", lambda user_id, payload: seen.append(committed()))
+
+    client.patch(f"/tasks/{task_id}/status", params={"status": "In Progress"})
+    assert job_queue.drain() == 1
+    assert seen == [(1, 0)]
+
+def test_failed_job_rolls_back_the_handler_writes(client, task_id):
+    @job_handler("test_fails_after_writing")
+    def fails_after_writing(db, payload):
+        main.on_task_status_changed(db, payload)
+        raise RuntimeError("crashed before the job was removed")
+
+    with database.SessionLocal() as db:
+        db.query(Task).filter(Task.id == task_id).update({"status": "In Progress"})
+        enqueue(db, "test_fails_after_writing", {"task_ids": [task_id], "status": "In Progress"})
+        db.commit()
+    job_queue.drain()
+    assert committed() == (0, 1)
+
+def test_bulk_status_update_rejects_duplicate_task_ids(client, task_id):
+    updates = [{"task_id": task_id, "status": "In Progress"}, {"task_id": task_id, "status": "Completed"}]
+    response = client.patch("/tasks/status", json={"updates": updates})
+    assert response.status_code == 422
+    with database.SessionLocal() as db:
+        assert db.get(Task, task_id).status == "Pending"
+
+def test_bulk_status_update_prefers_listed_status_over_where(client, task_id):
+    with database.SessionLocal() as db:
+        project_id = db.get(Task, task_id).project_id
+    response = client.patch("/tasks/status", json={
+        "updates": [{"task_id": task_id, "status": "Blocked"}],
+        "where": {"project_id": project_id, "status": "Completed"},
+    })
+    assert response.json()["results"] == [{"task_id": task_id, "ok": True, "old_status": "Pending", "status": "Blocked"}]
+
+def project_counters(task_id):
+    with database.SessionLocal() as db:
+        project = db.get(Project, db.get(Task, task_id).project_id)
+        return project.tasks_total, project.tasks_pending, project.tasks_in_progress, project.tasks_completed
+
+def test_stale_status_write_does_not_move_the_counters(client, task_id):
+    # Both sessions read the task as Pending; the second to write must not count Pending -> X again
+    with database.SessionLocal() as first, database.SessionLocal() as second:
+        stale = [first.query(Task.id, Task.project_id, Task.status).filter(Task.id == task_id).one()]
+        fresh = [second.query(Task.id, Task.project_id, Task.status).filter(Task.id == task_id).one()]
+
+        progress = ProgressDeltas()
+        assert main.set_task_statuses(second, fresh, {task_id: "Completed"}, progress) == {task_id}
+        progress.apply(second)
+        second.commit()
+
+        progress = ProgressDeltas()
+        assert main.set_task_statuses(first, stale, {task_id: "In Progress"}, progress) == set()
+        progress.apply(first)
+        first.commit()
+
+    assert project_counters(task_id) == (1, 0, 0, 1)
+    response = client.patch(f"/tasks/{task_id}/status", params={"status": "In Progress"})
+    assert response.json()["status"] == "In Progress"
+    assert project_counters(task_id) == (1, 0, 1, 0)
+
+def test_large_drawing_fan_out_is_queued_with_the_version_change(client, monkeypatch):
+    monkeypatch.setattr(main, "DRAWING_NOTIFY_DEFER_THRESHOLD", 1)
+    with database.SessionLocal() as db:
+        users = [User(username=name, password_hash="x", role="Director") for name in ("dana", "omar")]
+        db.add_all(users)
+        db.commit()
+        roles = [{"role": role, "userId": user.id} for role, user in zip(("Director", "Operation Head"), users)]
+    project = client.post("/projects/full-create", json={
+        "name": "Tower", "clientName": "Acme", "clientEmail": "ops@acme.example",
+        "clientPhone": "9800000000", "address": "1 Road", "roles": roles,
+    }).json()
+
+    client.patch(f"/projects/{project['project_id']}/drawing-version", params={"version": "R2"})
+    assert committed() == (0, 1)
+    assert job_queue.drain() == 1
+    assert committed() == (2, 0)
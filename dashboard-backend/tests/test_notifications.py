@@ -0,0 +1,46 @@
+import pytest
+import database
+import main
+from models import Notification, User
+from tests.conftest import auth_headers
+
+@pytest.fixture
+def user():
+    with database.SessionLocal() as db:
+        user = User(username="maria", password_hash="x", role="Supervisor")
+        db.add(user)
+        db.flush()
+        db.add_all([Notification(user_id=user.id, message=f"Update {i}") for i in range(3)])
+        db.commit()
+        return user.id
+
+def notification_ids(user_id):
+    with database.SessionLocal() as db:
+        return [n.id for n in db.query(Notification).filter(Notification.user_id == user_id).order_by(Notification.id)]
+
+def test_stream_replays_the_backlog_without_holding_a_connection(client, user, monkeypatch):
+    monkeypatch.setattr(main, "NOTIFICATION_BACKLOG_LIMIT", 2)
+    ids = notification_ids(user)
+    response = client.get("/notifications/stream", params={"after": 0}, headers=auth_headers("maria"))
+    assert response.status_code == 200
+    assert [int(line[4:]) for line in response.text.splitlines() if line.startswith("id: ")] == ids[:2]
+    assert database.engine.pool.checkedout() == 0
+
+def test_stream_rejects_unknown_users(client):
+    response = client.get("/notifications/stream", headers=auth_headers("nobody"))
+    assert response.status_code == 401
+
+@pytest.mark.parametrize("path", ["/notifications/mark-read", "/notifications/bulk-delete"])
+@pytest.mark.parametrize("body", [None, {}, {"ids": None}, {"all": False}, {"all": True, "ids": [1]}])
+def test_bulk_actions_need_an_explicit_selection(client, user, path, body):
+    response = client.post(path, json=body, headers=auth_headers("maria"))
+    assert response.status_code == 422
+    assert client.get("/notifications/count", headers=auth_headers("maria")).json()["unread"] == 3
+
+def test_bulk_actions_select_ids_up_to_id_or_all(client, user):
+    ids = notification_ids(user)
+    headers = auth_headers("maria")
+    assert client.post("/notifications/mark-read", json={"ids": ids[:1]}, headers=headers).json() == {"updated": 1}
+    assert client.post("/notifications/mark-read", json={"all": True}, headers=headers).json() == {"updated": 2}
+    assert client.post("/notifications/bulk-delete", json={"up_to_id": ids[1]}, headers=headers).json() == {"deleted": 2}
+    assert client.post("/notifications/bulk-delete", json={"all": True}, headers=headers).json() == {"deleted": 1}
@@ -0,0 +1,37 @@
+import sys
+import threading
+import time
+from profiler import is_idle
+
+def leaf_frame(thread):
+    return sys._current_frames()[thread.ident]
+
+def test_parked_threads_are_idle():
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+    try:
+        deadline = time.monotonic() + 2
+        while not is_idle(leaf_frame(thread)) and time.monotonic() < deadline:
+            time.sleep(0.01)  # until the thread reaches wait()
+        assert is_idle(leaf_frame(thread))
+    finally:
+        stop.set()
+        thread.join()
+
+def test_busy_get_is_sampled():
+    ready, stop = threading.Event(), threading.Event()
+
+    def get():
+        ready.set()
+        while not stop.is_set():
+            pass
+
+    thread = threading.Thread(target=get)
+    thread.start()
+    ready.wait()
+    try:
+        assert not is_idle(leaf_frame(thread))
+    finally:
+        stop.set()
+        thread.join()
@@ -0,0 +1,26 @@
+import database
+from models import User
+from tests.conftest import auth_headers
+
+def test_project_list_offers_only_public_fields(client):
+    client.post("/projects/", params={"name": "Tower"})
+    rows = client.get("/projects", params={"fields": "name,tasks_total,tasks_completed"}).json()
+    assert rows == [{"id": rows[0]["id"], "name": "Tower", "tasks_total": 15, "tasks_completed": 0}]
+
+    for field in ("client_email", "client_phone", "address"):
+        response = client.get("/projects", params={"fields": f"name,{field}"})
+        assert response.status_code == 400, field
+
+def test_project_search_needs_a_signed_in_user(client):
+    with database.SessionLocal() as db:
+        db.add(User(username="maria", password_hash="x", role="Supervisor"))
+        db.commit()
+    client.post("/projects/full-create", json={
+        "name": "Tower", "clientName": "Acme", "clientEmail": "ops@acme.example",
+        "clientPhone": "9800000000", "address": "1 Road", "roles": [],
+    })
+
+    for q in ("Tower", "Acme"):
+        assert client.get("/search", params={"q": q}).status_code == 401, q
+    rows = client.get("/search", params={"q": "Acme"}, headers=auth_headers("maria")).json()
+    assert [(row["name"], row["client_name"], row["address"]) for row in rows] == [("Tower", "Acme", "1 Road")]
@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import func, select
+import database
+from models import Project, RoleAssignment, User
+from seed import seed
+from tests.conftest import auth_headers, count_statements
+
+# Upper bounds on SQL statements per request for the project reads and the drawing-version
+# fan-out. Each route is measured on N and 10N seeded projects: the count must stay within the
+# bound and must not grow with the data, which is what an N+1 query would do.
+
+SMALL, LARGE = 5, 50
+
+def seeded(projects):
+    seed(database.engine, users=10, projects=projects, notifications=0)
+    with database.SessionLocal() as db:
+        # The user holding the most role assignments, so /my-tasks has several projects to group
+        username = db.execute(
+            select(User.username)
+            .join(RoleAssignment, RoleAssignment.user_id == User.id)
+            .group_by(User.id)
+            .order_by(func.count(RoleAssignment.id).desc())
+        ).scalars().first()
+        project_id = db.execute(select(func.max(Project.id))).scalar()  # one of the rows just seeded
+    return auth_headers(username), project_id
+
+ROUTES = {
+    # name: (max statements, request)
+    "GET /projects/": (3, lambda client, headers, pid: client.get("/projects/")),
+    "GET /projects/{id}": (3, lambda client, headers, pid: client.get(f"/projects/{pid}")),
+    "GET /my-tasks": (3, lambda client, headers, pid: client.get("/my-tasks", headers=headers)),
+    "PATCH /projects/{id}/drawing-version": (5, lambda client, headers, pid: client.patch(
+        f"/projects/{pid}/drawing-version", params={"version": "R9"})),
+}
+
+def measure(client, name, projects):
+    headers, project_id = seeded(projects)
+    bound, request = ROUTES[name]
+    with count_statements() as statements:
+        response = request(client, headers, project_id)
+    assert response.status_code == 200, response.text
+    return bound, len(statements)
+
+@pytest.mark.parametrize("name", list(ROUTES))
+def test_statement_count_is_bounded(client, clean_db, name):
+    bound, small = measure(client, name, SMALL)
+    assert small <= bound, f"{name}: {small} statements with {SMALL} projects (bound {bound})"
+
+@pytest.mark.parametrize("name", list(ROUTES))
+def test_statement_count_does_not_grow_with_data(client, name):
+    _, small = measure(client, name, SMALL)
+    _, large = measure(client, name, LARGE)
+    assert large == small, f"{name}: {small} statements for {SMALL} projects, {large} for {LARGE}"
@@ -0,0 +1,68 @@
+import asyncio
+import sqlite3
+import threading
+import time
+import pytest
+import view_cache
+from view_cache import SQLiteBackend, ViewCache
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(view_cache, "VIEW_CACHE_BUSY_TIMEOUT", 0.05)
+    return SQLiteBackend(path=str(tmp_path / "cache.db"))
+
+def fill(cache, key="project-1-1"):
+    renders = []
+
+    async def render():
+        renders.append(threading.get_ident())
+        return {}, b"{}"
+
+    async def run():
+        return await cache.get_or_render(key, "project:1", render), threading.get_ident()
+
+    (entry, loop_thread) = asyncio.run(run())
+    return entry, renders, loop_thread
+
+def test_sqlite_backend_runs_off_the_event_loop(backend, monkeypatch):
+    threads = []
+    get = backend.get
+    monkeypatch.setattr(backend, "get", lambda key: threads.append(threading.get_ident()) or get(key))
+
+    entry, renders, loop_thread = fill(ViewCache(backend))
+    assert entry == ({}, b"{}") and len(renders) == 1
+    assert threads and loop_thread not in threads
+    assert fill(ViewCache(backend))[1] == []  # stored: the second lookup is a hit
+
+def test_locked_cache_file_counts_as_a_miss(backend):
+    locker = sqlite3.connect(backend.path, isolation_level=None)
+    locker.execute("BEGIN EXCLUSIVE")
+    try:
+        start = time.monotonic()
+        entry, renders, _ = fill(ViewCache(backend))
+        assert time.monotonic() - start < 1
+        assert entry == ({}, b"{}") and len(renders) == 1
+    finally:
+        locker.execute("ROLLBACK")
+        locker.close()
+    assert backend.get("project-1-1") is None  # the write was skipped, not queued
+
+def test_cache_file_is_only_reset_for_another_database(backend):
+    backend.bind("db-1")
+    backend.set("project-1-1", "project:1", {}, b"{}")
+    backend.bind("db-1")  # another worker starting against the same database
+    assert backend.get("project-1-1") == ({}, b"{}")
+    backend.bind("db-2")
+    assert backend.get("project-1-1") is None
+
+def test_default_cache_path_depends_on_the_database(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    paths = {
+        view_cache.default_cache_path("sqlite:///./projects.db"),
+        view_cache.default_cache_path(f"sqlite:///{tmp_path}/other.db"),
+        view_cache.default_cache_path("postgresql://app@db/ambience"),
+    }
+    assert len(paths) == 3
+    assert view_cache.default_cache_path("sqlite:///./projects.db") == view_cache.default_cache_path(
+        f"sqlite:///{tmp_path}/projects.db"
+    )
@@ -0,0 +1,332 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy.engine import make_url
+from starlette.concurrency import run_in_threadpool
+from cache import TTLCache
+from database import DATABASE_URL
+
+# Cache of rendered JSON bodies for the project views (/projects/, /projects/{id}, /my-tasks).
+#
+# Keys embed the version counters from etags.py, so an entry can never outlive the data it was
+# rendered from: after any write, readers look up a new key. That keeps workers with their own
+# in-process cache correct without coordination. The handlers that write still call invalidate()
+# after their commit (write-through), which frees the stale entries right away and, with the
+# shared backend, for every worker at once.
+#
+# VIEW_CACHE_BACKEND:
+#   memory  per-process LRU (default)
+#   sqlite  one local SQLite file shared by every worker on the host (VIEW_CACHE_PATH; by
+#           default one file per DATABASE_URL, so apps on other databases never share it)
+#   off     no caching
+#
+# The keys' version counters start over when a database is re-created, so the sqlite file also
+# records which database it was filled from (see migrations.database_identity) and is emptied
+# only when a worker starts against a different one, not on every worker start.
+#
+# Concurrent misses for one key are collapsed: within a process the first request renders and
+# the rest await its result; across processes (sqlite backend) a short lease row makes other
+# workers poll for the entry instead of rendering it again.
+#
+# The sqlite backend's calls block, so the async routes make them on the threadpool, and a file
+# locked for longer than VIEW_CACHE_BUSY_TIMEOUT counts as a miss (reads, leases) or a skipped
+# write instead of holding up the request.
+
+VIEW_CACHE_BACKEND = os.getenv("VIEW_CACHE_BACKEND", "memory")
+VIEW_CACHE_SIZE = int(os.getenv("VIEW_CACHE_SIZE", "512"))
+VIEW_CACHE_TTL = float(os.getenv("VIEW_CACHE_TTL", "300"))
+def default_cache_path(database_url=DATABASE_URL):
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database and url.database != ":memory:":
+        url = url.set(database=os.path.abspath(url.database))
+    digest = hashlib.sha256(url.render_as_string(hide_password=False).encode()).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f"ambience-view-cache-{digest}.db")
+
+VIEW_CACHE_PATH = os.getenv("VIEW_CACHE_PATH") or default_cache_path()
+VIEW_CACHE_LEASE_SECONDS = float(os.getenv("VIEW_CACHE_LEASE_SECONDS", "5"))
+VIEW_CACHE_BUSY_TIMEOUT = float(os.getenv("VIEW_CACHE_BUSY_TIMEOUT", "0.25"))
+
+logger = logging.getLogger("ambience.view_cache")
+
+# Tag shared by every view that depends on the whole projects table
+ALL_PROJECTS = "projects"
+
+def project_tag(project_id):
+    return f"project:{project_id}"
+
+@lru_cache(maxsize=None)
+def _adapter(model):
+    return TypeAdapter(model)
+
+def render_json(model, data):
+    # Same validation and JSON output as a response_model route, done once per cache fill
+    adapter = _adapter(model)
+    return adapter.dump_json(adapter.validate_python(data))
+
+class MemoryBackend:
+    blocking = False
+
+    def __init__(self, maxsize=VIEW_CACHE_SIZE, ttl=VIEW_CACHE_TTL):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key):
+        entry = self._cache.get(key)
+        return None if entry is None else entry[1:]
+
+    def set(self, key, tag, headers, body):
+        self._cache.set(key, (tag, headers, body))
+
+    def delete_tags(self, tags):
+        tags = set(tags)
+        return self._cache.discard_where(lambda entry: entry[0] in tags)
+
+    def acquire(self, key):
+        return True  # single-flight within the process already covers this backend
+
+    def release(self, key):
+        pass
+
+    def clear(self):
+        self._cache.clear()
+
+    def bind(self, database_id):
+        pass  # starts empty with the process
+
+    def stats(self):
+        return self._cache.stats()
+
+class SQLiteBackend:
+    # Cache rows in a local SQLite file opened by every worker. Losing the file only costs
+    # re-renders, so it runs without fsync. One connection per thread.
+    blocking = True
+
+    def __init__(self, path=VIEW_CACHE_PATH, maxsize=VIEW_CACHE_SIZE, ttl=VIEW_CACHE_TTL):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS view_cache "
+                "(key TEXT PRIMARY KEY, tag TEXT, headers TEXT, body BLOB, expires_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_view_cache_tag ON view_cache (tag)")
+            conn.execute("CREATE TABLE IF NOT EXISTS view_cache_leases (key TEXT PRIMARY KEY, expires_at REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS view_cache_meta (name TEXT PRIMARY KEY, value TEXT)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=VIEW_CACHE_BUSY_TIMEOUT, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        try:
+            row = self._conn().execute(
+                "SELECT headers, body FROM view_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        except sqlite3.OperationalError:
+            row = None  # locked past the busy timeout
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, tag, headers, body):
+        conn = self._conn()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO view_cache (key, tag, headers, body, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, tag, json.dumps(headers), body, time.time() + self.ttl),
+            )
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._trim(conn)
+        except sqlite3.OperationalError:
+            pass  # locked; the next miss stores it
+
+    def _trim(self, conn):
+        # Drops expired rows, then the soonest-expiring ones past maxsize
+        conn.execute("DELETE FROM view_cache WHERE expires_at <= ?", (time.time(),))
+        conn.execute("DELETE FROM view_cache_leases WHERE expires_at <= ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM view_cache WHERE key IN "
+            "(SELECT key FROM view_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.maxsize,),
+        )
+
+    def delete_tags(self, tags):
+        # Runs after a commit, so a locked file must not fail the write; the versioned keys
+        # already keep readers off the stale entries, which then expire
+        tags = list(set(tags))
+        placeholders = ",".join("?" * len(tags))
+        try:
+            return self._conn().execute(f"DELETE FROM view_cache WHERE tag IN ({placeholders})", tags).rowcount
+        except sqlite3.OperationalError:
+            logger.warning("view cache invalidation skipped, cache file busy", extra={"tags": tags})
+            return 0
+
+    def acquire(self, key):
+        # True if this worker should render the entry; False if another worker holds a live lease
+        conn = self._conn()
+        now = time.time()
+        try:
+            conn.execute("DELETE FROM view_cache_leases WHERE key = ? AND expires_at <= ?", (key, now))
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO view_cache_leases (key, expires_at) VALUES (?, ?)",
+                (key, now + VIEW_CACHE_LEASE_SECONDS),
+            ).rowcount
+        except sqlite3.OperationalError:
+            return True  # busy: render without waiting on other workers
+        return inserted == 1
+
+    def release(self, key):
+        try:
+            self._conn().execute("DELETE FROM view_cache_leases WHERE key = ?", (key,))
+        except sqlite3.OperationalError:
+            pass  # the lease expires on its own
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM view_cache")
+        conn.execute("DELETE FROM view_cache_leases")
+
+    def bind(self, database_id):
+        # Empties the file if it was filled from another database; workers starting together
+        # check and reset under one write lock, so only the first of them clears anything
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError:
+            logger.warning("view cache not checked against the database, cache file busy")
+            return
+        try:
+            row = conn.execute("SELECT value FROM view_cache_meta WHERE name = 'database'").fetchone()
+            if row is None or row[0] != database_id:
+                conn.execute("DELETE FROM view_cache")
+                conn.execute("DELETE FROM view_cache_leases")
+                conn.execute(
+                    "INSERT OR REPLACE INTO view_cache_meta (name, value) VALUES ('database', ?)", (database_id,)
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def stats(self):
+        size = self._conn().execute("SELECT count(*) FROM view_cache").fetchone()[0]
+        return {"size": size, "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses, "evictions": 0}
+
+class ViewCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self._inflight = {}
+
+    async def _call(self, method, *args):
+        # Backend calls from the event loop; blocking backends run on the threadpool
+        if self.backend.blocking:
+            return await run_in_threadpool(method, *args)
+        return method(*args)
+
+    async def get_or_render(self, key, tag, render):
+        # Returns (headers, body) for key, awaiting render() -> (headers, body) on a miss
+        if self.backend is None:
+            return await render()
+        entry = await self._call(self.backend.get, key)
+        if entry is not None:
+            return entry
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The request that was rendering it went away; render it here instead
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            entry = await self._fill(key, tag, render)
+            future.set_result(entry)
+            return entry
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # waiters still get it; don't warn when there are none
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _fill(self, key, tag, render):
+        owned = await self._call(self.backend.acquire, key)
+        if not owned:
+            # Another worker is rendering this key; wait for its entry, render ourselves if it's slow
+            deadline = time.monotonic() + VIEW_CACHE_LEASE_SECONDS
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+                entry = await self._call(self.backend.get, key)
+                if entry is not None:
+                    return entry
+        try:
+            headers, body = await render()
+            await self._call(self.backend.set, key, tag, headers, body)
+            return headers, body
+        finally:
+            if owned:
+                await self._call(self.backend.release, key)
+
+    def invalidate(self, project_ids=()):
+        # Called after a commit that changed projects, tasks or role assignments
+        if self.backend is None:
+            return 0
+        return self.backend.delete_tags([ALL_PROJECTS] + [project_tag(pid) for pid in project_ids if pid is not None])
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def bind(self, database_id):
+        # Called at startup with an id of the database the entries will be rendered from
+        if self.backend is not None:
+            self.backend.bind(str(database_id))
+
+    def stats(self):
+        return self.backend.stats() if self.backend is not None else {}
+
+def create_view_cache(kind=VIEW_CACHE_BACKEND):
+    if kind == "off":
+        return ViewCache(None)
+    if kind == "sqlite":
+        return ViewCache(SQLiteBackend())
+    if kind == "memory":
+        return ViewCache(MemoryBackend())
+    raise ValueError(f"Unknown VIEW_CACHE_BACKEND {kind!r}")
+
+view_cache = create_view_cache()
+
+def cached_response(entry, response):
+    # The cached body plus its stored headers and those set on the route's response (ETag etc.)
+    headers, body = entry
+    return Response(content=body, media_type="application/json", headers={**headers, **response.headers})
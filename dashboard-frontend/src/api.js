@@ -16,4 +16,26 @@ api.interceptors.request.use(
   (error) => Promise.reject(error)
 );
 
+// List endpoints are keyset-paginated; follow the X-Next-After cursor until the last page
+export const fetchAllPages = async (url, params = {}) => {
+  const items = [];
+  let after;
+  do {
+    const res = await api.get(url, { params: { ...params, after } });
+    items.push(...res.data);
+    after = res.headers['x-next-after'];
+  } while (after);
+  return items;
+};
+
+// Server-Sent Events push of new notifications. EventSource can't set headers, so the token
+// goes in the query string; on reconnect the browser resumes from the last event id itself.
+export const subscribeNotifications = (onNotification, after) => {
+  const params = new URLSearchParams({ token: localStorage.getItem('token') || '' });
+  if (after !== undefined) params.set('after', after);
+  const source = new EventSource(`${api.defaults.baseURL}/notifications/stream?${params}`);
+  source.addEventListener('notification', (event) => onNotification(JSON.parse(event.data)));
+  return () => source.close();
+};
+
 export default api;
@@ -1,7 +1,7 @@
 import React, { useContext, useEffect, useState } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import { AuthContext } from '../AuthContext';
-import api from '../api';
+import api, { subscribeNotifications } from '../api';
 
 function Navbar() {
   const { logout } = useContext(AuthContext);
@@ -14,13 +14,15 @@ function Navbar() {
   };
 
   useEffect(() => {
-    fetchNotifications();
+    fetchUnreadCount();
+    // After the initial count, new notifications are pushed instead of re-fetched
+    return subscribeNotifications(() => setNotifCount((count) => count + 1));
   }, []);
 
-  const fetchNotifications = async () => {
+  const fetchUnreadCount = async () => {
     try {
-      const res = await api.get("/notifications");
-      setNotifCount(res.data.length);
+      const res = await api.get("/notifications/count");
+      setNotifCount(res.data.unread);
     } catch (err) {
       console.error("Failed to load notifications");
     }
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import api from '../api';
+import api, { fetchAllPages } from '../api';
 
 function AIAssistant() {
   const [projects, setProjects] = useState([]);
@@ -14,8 +14,7 @@ function AIAssistant() {
 
   const fetchProjects = async () => {
     try {
-      const res = await api.get("/projects");
-      setProjects(res.data);
+      setProjects(await fetchAllPages("/projects"));
     } catch (err) {
       console.error("Failed to fetch projects:", err);
     }
@@ -27,11 +26,38 @@ function AIAssistant() {
     setAIResponse("");
 
     try {
-      const aiRes = await api.post("/ai/analyze", {
-        projectName: selectedProject,
-        prompt: prompt
+      // Server-Sent Events over a POST body, so fetch + a stream reader instead of EventSource
+      const token = localStorage.getItem('token');
+      const res = await fetch(`${api.defaults.baseURL}/ai/analyze/stream`, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          ...(token ? { Authorization: `Bearer ${token}` } : {})
+        },
+        body: JSON.stringify({ projectName: selectedProject, prompt: prompt })
       });
-      setAIResponse(aiRes.data.analysis);
+      if (!res.ok) throw new Error(`HTTP ${res.status}`);
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split("\n\n");
+        buffer = events.pop();
+        for (const raw of events) {
+          const event = raw.match(/^event: (.*)$/m)?.[1];
+          const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] || "{}");
+          if (event === "chunk") {
+            setLoading(false);
+            setAIResponse((prev) => prev + data.text);
+          } else if (event === "error") {
+            throw new Error(data.detail);
+          }
+        }
+      }
     } catch (err) {
       console.error("AI analysis failed:", err);
       setAIResponse("Error generating AI report");
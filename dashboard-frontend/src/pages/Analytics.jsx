@@ -6,44 +6,42 @@ import { Chart as ChartJS, ArcElement, Tooltip, Legend, CategoryScale, LinearSca
 ChartJS.register(ArcElement, Tooltip, Legend, CategoryScale, LinearScale, BarElement);
 
 function Analytics() {
-  const [projects, setProjects] = useState([]);
+  const [summary, setSummary] = useState(null);
 
   useEffect(() => {
-    fetchProjects();
+    fetchSummary();
   }, []);
 
-  const fetchProjects = async () => {
+  const fetchSummary = async () => {
     try {
-      const response = await api.get("/projects/");
-      setProjects(response.data);
+      const response = await api.get("/analytics/summary");
+      setSummary(response.data);
     } catch (error) {
-      console.error("Error fetching projects:", error);
+      console.error("Error fetching analytics summary:", error);
     }
   };
 
-  const allTasks = projects.flatMap(p => p.tasks);
-  const totalTasks = allTasks.length;
-  const pendingTasks = allTasks.filter(t => t.status !== "Completed").length;
+  const projects = summary ? summary.projects : [];
+  const totalTasks = summary ? summary.task_count : 0;
+  const pendingTasks = summary ? summary.pending_count : 0;
+  const counts = summary ? summary.status_counts : {};
 
   const statusCounts = {
-    Pending: allTasks.filter(t => t.status === "Pending").length,
-    "In Progress": allTasks.filter(t => t.status === "In Progress").length,
-    Completed: allTasks.filter(t => t.status === "Completed").length,
-    Blocked: allTasks.filter(t => t.status === "Blocked").length,
-    Waiting: allTasks.filter(t => t.status === "Waiting for Approval").length
+    Pending: counts["Pending"] || 0,
+    "In Progress": counts["In Progress"] || 0,
+    Completed: counts["Completed"] || 0,
+    Blocked: counts["Blocked"] || 0,
+    Waiting: counts["Waiting for Approval"] || 0
   };
 
-  const roleCounts = {};
-  allTasks.forEach(task => {
-    roleCounts[task.role] = (roleCounts[task.role] || 0) + 1;
-  });
+  const roleCounts = summary ? summary.role_counts : {};
 
   return (
     <div style={{ padding: '30px', background: '#f9f9f9' }}>
       <h1 style={{ textAlign: 'center', marginBottom: '30px', color: '#0066b3' }}>Ambience Analytics Dashboard</h1>
 
       <div style={{ display: 'flex', justifyContent: 'space-around', marginBottom: '40px' }}>
-        <MetricCard title="Total Projects" value={projects.length} />
+        <MetricCard title="Total Projects" value={summary ? summary.project_count : 0} />
         <MetricCard title="Total Tasks" value={totalTasks} />
         <MetricCard title="Pending Tasks" value={pendingTasks} />
       </div>
@@ -77,10 +75,9 @@ function Analytics() {
         </div>
       </div>
 
-      <h3 style={{ marginTop: '50px', marginBottom: '20px' }}>Project Progress</h3>
+      <h3 style={{ marginTop: '50px', marginBottom: '20px' }}>Project Progress (most open tasks)</h3>
       {projects.map(project => {
-        const completed = project.tasks.filter(t => t.status === "Completed").length;
-        const progress = totalTasks === 0 ? 0 : (completed / project.tasks.length) * 100;
+        const progress = project.completion * 100;
 
         return (
           <div key={project.id} style={{ marginBottom: '20px' }}>
@@ -1,19 +1,30 @@
 import React, { useEffect, useState } from "react";
-import api from "../api";
+import api, { fetchAllPages, subscribeNotifications } from "../api";
 
 function Notifications() {
   const [notifications, setNotifications] = useState([]);
 
   useEffect(() => {
-    fetchNotifications();
+    let unsubscribe;
+    fetchNotifications().then((lastId) => {
+      unsubscribe = subscribeNotifications(
+        (notif) => setNotifications((prev) => [...prev, notif]),
+        lastId
+      );
+    });
+    return () => unsubscribe && unsubscribe();
   }, []);
 
   const fetchNotifications = async () => {
     try {
-      const res = await api.get("/notifications");
-      setNotifications(res.data);
+      const items = await fetchAllPages("/notifications");
+      setNotifications(items);
+      const lastId = items.length ? items[items.length - 1].id : 0;
+      if (lastId) await api.post("/notifications/mark-read", { up_to_id: lastId });
+      return lastId;
     } catch (err) {
       console.error("Error fetching notifications", err);
+      return 0;
     }
   };
 
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from "react";
-import api from "../api";
+import api, { fetchAllPages } from "../api";
 import { useNavigate } from "react-router-dom";
 
 function Projects() {
@@ -36,8 +36,7 @@ function Projects() {
 
   const fetchProjects = async () => {
     try {
-      const res = await api.get("/projects/");
-      setProjects(res.data);
+      setProjects(await fetchAllPages("/projects/"));
     } catch (err) {
       console.error("Error fetching projects:", err);
     }
@@ -45,8 +44,7 @@ function Projects() {
 
   const fetchUsers = async () => {
     try {
-      const res = await api.get("/users");
-      setUsers(res.data);
+      setUsers(await fetchAllPages("/users"));
     } catch (err) {
       console.error("Error fetching users:", err);
     }